@@ -0,0 +1,180 @@
+from collections import deque
+import math
+import sys
+
+# --- Detection Parameters --- #
+# Mirror ROLLING_WINDOW_SIZE / ANOMALY_THRESHOLD_STD in vertex_ai_pipelines/pipeline/pipeline.py
+ROLLING_WINDOW_SIZE = 60
+ANOMALY_THRESHOLD_STD = 3
+# Relative drop in the sum of squared deviations that triggers a window recompute
+INV_COND_TOL = sys.float_info.epsilon * 1e3
+METRICS_TO_ANALYZE = ['kiln_temperature', 'fuel_consumption', 'vibration', 'pressure', 'oxygen']
+
+class RollingAnomalyDetector:
+    """
+    Online rolling z-score detector for a single sensor.
+
+    Keeps a ring buffer of the last `window` samples plus running statistics,
+    so each update costs O(1) regardless of the window size. The running mean
+    (Kahan-compensated sum) and variance (Welford add/remove) follow the same
+    update order as pandas' fixed-window rolling kernels, so `update` returns
+    exactly the flag the batch pipeline computes with
+    `(x - rolling.mean()).abs() > rolling.std() * threshold`. Like pandas, the
+    variance is recomputed from the buffer when an update looks numerically
+    unstable, which keeps the amortized cost constant.
+    """
+
+    def __init__(self, window=ROLLING_WINDOW_SIZE, threshold_std=ANOMALY_THRESHOLD_STD):
+        self.window = window
+        self.threshold_std = threshold_std
+        self._buffer = deque(maxlen=window)
+        # Mean state (Kahan-compensated running sum)
+        self._nobs = 0
+        self._sum = 0.0
+        self._neg_ct = 0
+        self._sum_comp_add = 0.0
+        self._sum_comp_remove = 0.0
+        # Variance state (Welford)
+        self._mean = 0.0
+        self._ssqdm = 0.0
+        self._var_nobs = 0
+        self._var_comp_add = 0.0
+        self._var_comp_remove = 0.0
+        self._unstable = False
+        # Runs of identical values, so the mean of a flat signal is exact
+        self._same_count = 0
+        self._prev_value = math.nan
+
+    def _add_mean(self, val):
+        if val != val:
+            return
+        self._nobs += 1
+
+        y = val - self._sum_comp_add
+        t = self._sum + y
+        self._sum_comp_add = t - self._sum - y
+        self._sum = t
+        if math.copysign(1.0, val) < 0:
+            self._neg_ct += 1
+
+        if val == self._prev_value:
+            self._same_count += 1
+        else:
+            self._same_count = 1
+        self._prev_value = val
+
+    def _remove_mean(self, val):
+        if val != val:
+            return
+        self._nobs -= 1
+
+        y = -val - self._sum_comp_remove
+        t = self._sum + y
+        self._sum_comp_remove = t - self._sum - y
+        self._sum = t
+        if math.copysign(1.0, val) < 0:
+            self._neg_ct -= 1
+
+    def _add_var(self, val):
+        if val != val:
+            return
+        prev_m2 = self._ssqdm
+        self._var_nobs += 1
+
+        prev_mean = self._mean - self._var_comp_add
+        y = val - self._var_comp_add
+        t = y - self._mean
+        self._var_comp_add = t + self._mean - y
+        self._mean = self._mean + t / float(self._var_nobs)
+        self._ssqdm = self._ssqdm + (val - prev_mean) * (val - self._mean)
+        if prev_m2 * INV_COND_TOL > self._ssqdm:
+            self._unstable = True
+
+    def _remove_var(self, val):
+        if val != val:
+            return
+        prev_m2 = self._ssqdm
+        self._var_nobs -= 1
+        if not self._var_nobs:
+            self._mean = 0.0
+            self._ssqdm = 0.0
+            self._unstable = False
+            return
+
+        prev_mean = self._mean - self._var_comp_remove
+        y = val - self._var_comp_remove
+        t = y - self._mean
+        self._var_comp_remove = t + self._mean - y
+        self._mean = self._mean - t / float(self._var_nobs)
+        self._ssqdm = self._ssqdm - (val - prev_mean) * (val - self._mean)
+        if prev_m2 * INV_COND_TOL > self._ssqdm:
+            self._unstable = True
+
+    def _recompute_var(self):
+        self._var_nobs = 0
+        self._mean = self._ssqdm = self._var_comp_add = self._var_comp_remove = 0.0
+        for val in self._buffer:
+            self._add_var(val)
+        self._unstable = False
+
+    @property
+    def mean(self):
+        """Rolling mean over the current window, NaN until the window is full."""
+        if self._nobs < self.window or self._nobs == 0:
+            return math.nan
+        if self._same_count >= self._nobs:
+            return self._prev_value
+        result = self._sum / float(self._nobs)
+        if self._neg_ct == 0 and result < 0:
+            return 0.0
+        if self._neg_ct == self._nobs and result > 0:
+            return 0.0
+        return result
+
+    @property
+    def std(self):
+        """Rolling sample standard deviation (ddof=1), NaN until the window is full."""
+        if self._var_nobs < self.window or self._var_nobs <= 1:
+            return math.nan
+        var = self._ssqdm / (float(self._var_nobs) - 1.0)
+        return math.sqrt(var) if var >= 0 else 0.0
+
+    def update(self, value):
+        """
+        Pushes one sample and returns whether it is anomalous.
+        """
+        value = float(value)
+        if len(self._buffer) == self.window:
+            self._remove_mean(self._buffer[0])
+            self._remove_var(self._buffer[0])
+        self._buffer.append(value)
+        self._add_mean(value)
+        self._add_var(value)
+        if self._unstable:
+            self._recompute_var()
+        return abs(value - self.mean) > self.std * self.threshold_std
+
+    def update_batch(self, values):
+        return [self.update(value) for value in values]
+
+class KilnAnomalyDetector:
+    """
+    One RollingAnomalyDetector per sensor, fed with whole kiln samples.
+    """
+
+    def __init__(self, metrics=METRICS_TO_ANALYZE, window=ROLLING_WINDOW_SIZE, threshold_std=ANOMALY_THRESHOLD_STD):
+        self.detectors = {metric: RollingAnomalyDetector(window, threshold_std) for metric in metrics}
+
+    def update(self, sample):
+        """
+        Pushes one sample (a mapping of metric name to value) and returns a
+        mapping of metric name to anomaly flag. Metrics missing from the sample
+        are treated as missing readings.
+        """
+        return {
+            metric: detector.update(sample.get(metric, math.nan))
+            for metric, detector in self.detectors.items()
+        }
+
+    def update_batch(self, samples):
+        return [self.update(sample) for sample in samples]
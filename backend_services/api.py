@@ -1,4 +1,5 @@
-from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi import APIRouter, HTTPException, Query, Request, Response, WebSocket
+from fastapi.responses import StreamingResponse
 from typing import List, Dict, Any
 from pydantic import BaseModel
 import time
@@ -11,6 +12,13 @@ from google.genai import types
 import os
 from dotenv import load_dotenv
 from livekit.api import AccessToken, VideoGrants
+from backend_services.dashboard_data import build_energy_cockpit, build_kiln_health, build_predictive_quality
+from backend_services.downsampling import DEFAULT_TREND_POINTS, MIN_TREND_POINTS
+from backend_services.overview import OverviewAggregator, Section
+from backend_services.versioned_state import VersionedState
+from backend_services.bigquery_client import dashboard_cache
+from backend_services.http_caching import ConditionalResponder, OrjsonResponse
+from backend_services.live_feed import KilnTelemetrySource, TelemetryHub, serve_websocket, sse_events
 
 load_dotenv()
 
@@ -156,6 +164,20 @@ variance_analysis_data = [
 
 # --- API Endpoints ---
 
+# Upper bound on points per trend array; clients ask for roughly their chart width
+MAX_TREND_POINTS = 5000
+
+# Polled dashboard endpoints are served pre-rendered, and answer If-None-Match
+# with 304, until their cached data changes
+conditional = ConditionalResponder(dashboard_cache)
+
+def _windowed_section(builder, timerange, fallback, max_points):
+    # The mock data above is served until the dataset has rows for the window
+    try:
+        return builder(timerange, fallback, max_points)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/agent/actions")
 def get_agent_actions():
     return action_log_data
@@ -181,12 +203,13 @@ def reject_recommendation(rec_id: int):
     raise HTTPException(status_code=404, detail="Recommendation not found")
 
 @router.get("/energy_cockpit")
-def get_energy_cockpit(timerange: str = "7d"):
-    return energy_cockpit_data
+def get_energy_cockpit(request: Request, timerange: str = "7d", max_points: int = Query(DEFAULT_TREND_POINTS, ge=MIN_TREND_POINTS, le=MAX_TREND_POINTS)):
+    return conditional.respond(request, lambda: _windowed_section(
+        build_energy_cockpit, timerange, energy_cockpit_data, max_points))
 
 @router.get("/process_flow")
-def get_process_flow():
-    return process_flow_data
+def get_process_flow(request: Request):
+    return conditional.respond(request, lambda: process_flow_data)
 
 @router.post("/agent_chat")
 async def agent_chat(request: ChatRequest):
@@ -239,28 +262,70 @@ async def data_science_chat(request: ChatRequest):
         raise HTTPException(status_code=e.response.status_code, detail=f"Error from data science agent: {e.response.text}")
 
 @router.get("/kiln_health")
-def get_kiln_health(timerange: str = "24h"):
-    return kiln_health_data
+def get_kiln_health(request: Request, timerange: str = "24h", max_points: int = Query(DEFAULT_TREND_POINTS, ge=MIN_TREND_POINTS, le=MAX_TREND_POINTS)):
+    return conditional.respond(request, lambda: _windowed_section(
+        build_kiln_health, timerange, kiln_health_data, max_points))
 
 @router.get("/predictive_quality")
-def get_predictive_quality(timerange: str = "7d"):
-    return predictive_quality_data
+def get_predictive_quality(request: Request, timerange: str = "7d", max_points: int = Query(DEFAULT_TREND_POINTS, ge=MIN_TREND_POINTS, le=MAX_TREND_POINTS)):
+    return conditional.respond(request, lambda: _windowed_section(
+        build_predictive_quality, timerange, predictive_quality_data, max_points))
 
 @router.get("/variance_analysis")
-def get_variance_analysis():
-    return variance_analysis_data
+def get_variance_analysis(request: Request):
+    return conditional.respond(request, lambda: variance_analysis_data)
+
+# Sections load concurrently with the same defaults as their own endpoints
+overview_aggregator = OverviewAggregator([
+    Section("action_log", lambda: action_log_data),
+    Section("recommendations", lambda: recommendations_data),
+    Section("energy_cockpit", lambda: build_energy_cockpit("7d", energy_cockpit_data), fallback=energy_cockpit_data),
+    Section("process_flow", lambda: process_flow_data),
+    Section("kiln_health", lambda: build_kiln_health("24h", kiln_health_data), fallback=kiln_health_data),
+    Section("predictive_quality", lambda: build_predictive_quality("7d", predictive_quality_data),
+            fallback=predictive_quality_data),
+    Section("variance_analysis", lambda: variance_analysis_data),
+])
+
+# Numbers each distinct overview so clients can fetch only what changed
+overview_state = VersionedState()
 
 @router.get("/overview")
-def get_overview():
-    return {
-        "action_log": action_log_data,
-        "recommendations": recommendations_data,
-        "energy_cockpit": energy_cockpit_data,
-        "process_flow": process_flow_data,
-        "kiln_health": kiln_health_data,
-        "predictive_quality": predictive_quality_data,
-        "variance_analysis": variance_analysis_data,
-    }
+async def get_overview(since: str | None = None):
+    """
+    Without `since`, returns the full overview. With the version from a
+    previous response's X-Overview-Version header, returns
+    {"version", "patch"} (JSON-patch operations) or, on a version gap,
+    {"version", "snapshot"}.
+    """
+    overview, stale = await overview_aggregator.gather()
+    version = overview_state.update(overview)
+    headers = {"X-Overview-Version": version}
+    if stale:
+        # Lets the frontend flag cards that are showing their last known value
+        headers["X-Stale-Sections"] = ",".join(stale)
+    content = overview if since is None else overview_state.changes_since(since)
+    # Returning the response directly skips jsonable_encoder
+    return OrjsonResponse(content, headers=headers)
+
+
+# One producer polls for new samples and alerts while any client is connected
+# and fans them out to every open stream
+live_hub = TelemetryHub(KilnTelemetrySource())
+
+@router.get("/live")
+async def stream_live():
+    return StreamingResponse(sse_events(live_hub), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.websocket("/ws/live")
+async def live_socket(websocket: WebSocket):
+    await websocket.accept()
+    await serve_websocket(live_hub, websocket)
+
+@router.get("/live/stats")
+def get_live_stats():
+    return live_hub.stats()
 
 
 settings_data = {
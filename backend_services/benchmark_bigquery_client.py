@@ -0,0 +1,45 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from google.cloud import bigquery
+from kiln_storage.bigquery_backend import get_bigquery_client
+from backend_services.bigquery_client import PROJECT_ID
+
+QUERY = "SELECT 1 AS x"
+
+def per_call_client():
+    # The previous behaviour: a fresh client (credential discovery + HTTP session) per cache miss
+    client = bigquery.Client(project=PROJECT_ID)
+    client.query(QUERY).to_dataframe()
+
+def shared_client():
+    get_bigquery_client(PROJECT_ID).query(QUERY).to_dataframe()
+
+def measure(fn, iterations):
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def report(label, timings):
+    timings = sorted(timings)
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"{label:<20} p50 {statistics.median(timings):8.1f} ms   p95 {p95:8.1f} ms   max {timings[-1]:8.1f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare cold-miss latency with per-call and shared BigQuery clients.")
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    # Warm the shared client once so its one-off setup is not counted as a miss
+    shared_client()
+    report("per-call client", measure(per_call_client, args.iterations))
+    report("shared client", measure(shared_client, args.iterations))
@@ -0,0 +1,115 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Add the project root and the simulator to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data_simulation')))
+
+# Unless pointed at a real dataset, build the payloads from a throwaway local
+# one that run_benchmark fills with simulated data
+os.environ.setdefault("STORAGE_BACKEND", "local")
+if "LOCAL_STORAGE_DIR" not in os.environ:
+    os.environ["LOCAL_STORAGE_DIR"] = tempfile.mkdtemp(prefix="benchmark_responses-")
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from backend_services.bigquery_client import ALERTS_TABLE_ID, DATASET_ID, MODEL_PREDICTIONS_TABLE_ID, PROJECT_ID, SOURCE_TABLE_ID
+from backend_services.compression import compress
+from backend_services.dashboard_data import DEFAULT_TREND_POINTS, build_energy_cockpit, build_kiln_health, build_predictive_quality
+from backend_services.http_caching import dumps
+from kiln_storage import STORAGE_BACKEND, get_storage
+from kiln_storage.rollups import ROLLUP_RESOLUTIONS, rollup_table_id
+
+# --- Configuration --- #
+SIMULATED_DAYS = 7  # Covers the longest default timerange below
+
+# Timeranges and point counts the dashboard requests by default
+ENDPOINTS = {
+    "kiln_health": lambda fallback, max_points: build_kiln_health("24h", fallback, max_points),
+    "energy_cockpit": lambda fallback, max_points: build_energy_cockpit("7d", fallback, max_points),
+    "predictive_quality": lambda fallback, max_points: build_predictive_quality("7d", fallback, max_points),
+}
+
+def seed_local_dataset(num_days=SIMULATED_DAYS):
+    """
+    Fills the local dataset with simulated source rows, alerts, predictions
+    and rollups, unless it already has source data.
+    """
+    from populate_analysis_tables import build_model_predictions
+    from simulate_kiln_data import generate_kiln_data_vectorized
+    from vertex_ai_pipelines.pipeline.pipeline import SAMPLE_INTERVAL, build_rollup
+
+    storage = get_storage(PROJECT_ID, DATASET_ID)
+    if storage.table_exists(SOURCE_TABLE_ID):
+        return
+    df, alerts_df = generate_kiln_data_vectorized(num_days=num_days, seed=0)
+    df['timestamp'] = df['timestamp'].dt.tz_localize("UTC")
+    alerts_df['timestamp'] = alerts_df['timestamp'].dt.tz_localize("UTC")
+    storage.write_table(df, SOURCE_TABLE_ID, partition_field="timestamp")
+    storage.write_table(alerts_df, ALERTS_TABLE_ID, partition_field="timestamp")
+    storage.write_table(build_model_predictions(df), MODEL_PREDICTIONS_TABLE_ID, partition_field="timestamp")
+    until = df['timestamp'].max() + SAMPLE_INTERVAL
+    for resolution, freq in ROLLUP_RESOLUTIONS.items():
+        storage.write_table(build_rollup(df, freq, until), rollup_table_id(resolution), partition_field="timestamp")
+    print(f"Seeded {num_days} simulated days ({len(df)} rows) into {storage.root_dir}")
+
+def build_payloads(max_points):
+    payloads = {}
+    for name, build in ENDPOINTS.items():
+        fallback = {}
+        payload = build(fallback, max_points)
+        # Builders hand back the fallback itself when the window has no data
+        if payload is fallback:
+            raise RuntimeError(f"No data for {name}; the benchmark needs a populated dataset.")
+        payloads[name] = payload
+    payloads["overview"] = dict(payloads)
+    return payloads
+
+def default_render(payload):
+    # What FastAPI does for a returned dict: jsonable_encoder, then JSONResponse.render
+    return json.dumps(jsonable_encoder(payload), ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode("utf-8")
+
+def cached_render(body):
+    # A rendered-cache hit: the stored bytes go straight into a Response
+    return Response(content=body, media_type="application/json").body
+
+def time_per_call(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+def run_benchmark(max_points, iterations):
+    """
+    Compares the per-request cost of turning each dashboard payload into a
+    response body: FastAPI's default encoder, orjson, and a pre-rendered hit,
+    plus the one-off gzip cost of a pre-rendered body and its encoded size.
+    """
+    if STORAGE_BACKEND == "local":
+        seed_local_dataset()
+    payloads = build_payloads(max_points)
+
+    print(f"max_points={max_points}, mean of {iterations} calls")
+    print(f"{'endpoint':<20} {'bytes':>9} {'gzip bytes':>11} {'default':>11} {'orjson':>11} {'cached':>11} {'gzip':>11}")
+    for name, payload in payloads.items():
+        body = dumps(payload)
+        assert json.loads(body) == json.loads(default_render(payload))
+        default_time = time_per_call(lambda: default_render(payload), iterations)
+        orjson_time = time_per_call(lambda: dumps(payload), iterations)
+        cached_time = time_per_call(lambda: cached_render(body), iterations)
+        gzip_time = time_per_call(lambda: compress(body, "gzip"), iterations)
+        print(f"{name:<20} {len(body):>9} {len(compress(body, 'gzip')):>11} {default_time * 1e6:>8.0f} us "
+              f"{orjson_time * 1e6:>8.0f} us {cached_time * 1e6:>8.1f} us {gzip_time * 1e6:>8.0f} us   "
+              f"({default_time / orjson_time:.0f}x / {default_time / cached_time:.0f}x)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark JSON rendering of the dashboard payloads.")
+    parser.add_argument("--max-points", type=int, default=DEFAULT_TREND_POINTS)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    run_benchmark(args.max_points, args.iterations)
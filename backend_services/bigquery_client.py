@@ -1,18 +1,34 @@
 from google.cloud import bigquery
 import pandas as pd
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import os
+import sys
 import logging
-import time
-from threading import Lock
+from dataclasses import dataclass
 import yaml
 
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from kiln_storage import get_storage
+from kiln_storage.bigquery_backend import get_bigquery_client
+from backend_services.cache import TTLCache, make_key
+
 # --- Configuration --- #
 PROJECT_ID = os.getenv("GCP_PROJECT_ID", "operations-472416")
 DATASET_ID = "kiln_data_dataset"
 MODEL_PREDICTIONS_TABLE_ID = "model_predictions"
 VARIANCE_ANALYSIS_TABLE_ID = "variance_analysis"
 MOCK_DATA_TABLE_ID = "mock_data"
+SOURCE_TABLE_ID = "simulated_kiln_data"
+ALERTS_TABLE_ID = "alerts"
 CACHE_TTL_SECONDS = 60  # Time-to-live for the cache in seconds
+CACHE_REFRESH_AHEAD_SECONDS = 5  # Start a background refresh this long before expiry
+CACHE_MAX_STALE_SECONDS = int(os.environ.get("CACHE_MAX_STALE_SECONDS", 600))  # Oldest data served while refreshing
+CACHE_MAX_BYTES = int(os.environ.get("CACHE_MAX_BYTES", 256 * 1024 * 1024))  # Estimated in-memory size bound
+TOOL_CACHE_TTL_SECONDS = 3600  # Default result TTL for tools without cache_ttl_seconds in tools.yaml
+TOOL_MAX_CONCURRENCY = int(os.environ.get("TOOL_MAX_CONCURRENCY", 8))  # Tool queries in flight per toolbox
 TOOLS_FILE = os.path.join(os.path.dirname(__file__), 'tools.yaml')
 
 # --- Logging --- #
@@ -20,19 +36,52 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # --- Caches --- #
-_analysis_cache = {"data": pd.DataFrame(), "last_updated": 0}
-_analysis_cache_lock = Lock()
-
-_mock_data_cache = {"data": None, "last_updated": 0}
-_mock_data_cache_lock = Lock()
-
-_predictions_cache = {"data": pd.DataFrame(), "last_updated": 0}
-_predictions_cache_lock = Lock()
+# Shared by every loader; keys come from make_key(loader_name, **query_params)
+dashboard_cache = TTLCache(
+    max_bytes=CACHE_MAX_BYTES,
+    default_ttl=CACHE_TTL_SECONDS,
+    refresh_ahead=CACHE_REFRESH_AHEAD_SECONDS,
+    max_stale=CACHE_MAX_STALE_SECONDS,
+    name="dashboard_cache",
+)
+
+@dataclass(frozen=True)
+class CompiledTool:
+    """
+    A tools.yaml entry resolved once at load time: the statement, the ordered
+    (name, BigQuery type) pairs of its parameters and its result cache TTL.
+    """
+    name: str
+    statement: str
+    parameters: tuple = ()
+    cache_ttl_seconds: float = TOOL_CACHE_TTL_SECONDS
+
+    def bind(self, parameters):
+        return tuple(parameters[name] for name, _ in self.parameters)
+
+    def job_config(self, values):
+        return bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ScalarQueryParameter(name, type_, value)
+                for (name, type_), value in zip(self.parameters, values)
+            ]
+        )
 
 class BigQueryToolbox:
-    def __init__(self, tools_file=TOOLS_FILE):
+    # ML.FORECAST tools only exist in BigQuery, so the toolbox always talks to
+    # BigQuery directly rather than through the configured storage backend
+    def __init__(self, tools_file=TOOLS_FILE, max_concurrency=TOOL_MAX_CONCURRENCY):
         self.tools = self._load_tools(tools_file)
-        self.client = bigquery.Client(project=PROJECT_ID)
+        self.registry = self._compile_tools(self.tools)
+        # Results are keyed on (tool name, bound parameter values); an expired
+        # forecast is served once more while it is re-run in the background
+        self.cache = TTLCache(max_bytes=CACHE_MAX_BYTES, default_ttl=TOOL_CACHE_TTL_SECONDS,
+                              refresh_ahead=0, name="tool_cache")
+        self.client = get_bigquery_client(PROJECT_ID)
+        # The BigQuery client is blocking, so the async API runs jobs on this
+        # pool and awaits them from the event loop; its size caps the jobs in flight
+        self.max_concurrency = max_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="bq-tool")
 
     def _load_tools(self, tools_file):
         try:
@@ -45,79 +94,146 @@ class BigQueryToolbox:
             logger.error(f"Error parsing YAML file: {e}")
             return None
 
+    def _compile_tools(self, tools):
+        registry = {}
+        for tool in (tools or {}).get('tools', []):
+            registry[tool['name']] = CompiledTool(
+                name=tool['name'],
+                statement=tool['statement'],
+                parameters=tuple((p['name'], p['type'].upper()) for p in tool.get('parameters', [])),
+                cache_ttl_seconds=tool.get('cache_ttl_seconds', TOOL_CACHE_TTL_SECONDS),
+            )
+        return registry
+
     def get_tools(self):
         return self.tools.get('tools', [])
 
-    def execute_tool(self, tool_name, parameters):
-        if not self.tools:
-            return None
+    def cache_stats(self):
+        return self.cache.stats()
 
-        tool = next((t for t in self.tools.get('tools', []) if t['name'] == tool_name), None)
+    def _run_query(self, tool, values):
+        logger.info(f"Executing tool '{tool.name}' with parameters: {values}")
+        query_job = self.client.query(tool.statement, job_config=tool.job_config(values))
+        return query_job.to_dataframe()
 
+    def execute_tool(self, tool_name, parameters):
+        tool = self.registry.get(tool_name)
         if not tool:
             logger.error(f"Tool '{tool_name}' not found.")
             return None
 
-        query = tool['statement']
-        job_config = bigquery.QueryJobConfig(
-            query_parameters=[
-                bigquery.ScalarQueryParameter(param['name'], param['type'].upper(), parameters[param['name']])
-                for param in tool.get('parameters', [])
-            ]
-        )
-
+        values = tool.bind(parameters)
         try:
-            logger.info(f"Executing tool '{tool_name}' with parameters: {parameters}")
-            query_job = self.client.query(query, job_config=job_config)
-            results = query_job.to_dataframe()
-            return results
+            if not tool.cache_ttl_seconds:
+                return self._run_query(tool, values)
+            return self.cache.get_or_load(
+                (tool_name, values), lambda: self._run_query(tool, values), ttl=tool.cache_ttl_seconds)
         except Exception as e:
             logger.error(f"An error occurred while executing tool '{tool_name}': {e}")
             return None
 
+    async def execute_tool_async(self, tool_name, parameters):
+        """
+        Awaitable execute_tool: the job is submitted and waited on in the
+        toolbox's thread pool, so the event loop is never blocked.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.execute_tool, tool_name, parameters)
+
+    async def execute_tools_async(self, calls, max_concurrency=None):
+        """
+        Runs (tool_name, parameters) pairs concurrently, at most
+        `max_concurrency` at a time, and returns their results in order.
+
+        The toolbox's thread pool is the ceiling: `max_concurrency` can lower
+        it for one batch but values above the toolbox's own max_concurrency
+        are clamped to it.
+        """
+        limit = self.max_concurrency if max_concurrency is None else min(max_concurrency, self.max_concurrency)
+        semaphore = asyncio.Semaphore(limit)
+
+        async def run(tool_name, parameters):
+            async with semaphore:
+                return await self.execute_tool_async(tool_name, parameters)
+
+        return await asyncio.gather(*(run(name, params) for name, params in calls))
+
+def _query_variance_analysis() -> pd.DataFrame:
+    return get_storage(PROJECT_ID, DATASET_ID).read_table(VARIANCE_ANALYSIS_TABLE_ID)
+
+def _query_mock_data() -> dict:
+    df = get_storage(PROJECT_ID, DATASET_ID).read_table(MOCK_DATA_TABLE_ID, ['key', 'data'])
+    return dict(zip(df['key'], df['data']))
+
+def _query_model_predictions() -> pd.DataFrame:
+    return get_storage(PROJECT_ID, DATASET_ID).read_table(MODEL_PREDICTIONS_TABLE_ID)
+
 def load_variance_analysis_data() -> pd.DataFrame:
-    with _analysis_cache_lock:
-        if time.time() - _analysis_cache["last_updated"] < CACHE_TTL_SECONDS:
-            return _analysis_cache["data"]
-        client = bigquery.Client(project=PROJECT_ID)
-        query = f"SELECT * FROM `{PROJECT_ID}.{DATASET_ID}.{VARIANCE_ANALYSIS_TABLE_ID}`"
-        try:
-            df = client.query(query).to_dataframe()
-            _analysis_cache["data"] = df
-            _analysis_cache["last_updated"] = time.time()
-            return df
-        except Exception as e:
-            logger.error(f"An error occurred while loading analysis data: {e}")
-            return pd.DataFrame()
+    return dashboard_cache.get_or_load(
+        make_key("variance_analysis"), _query_variance_analysis, empty=pd.DataFrame)
 
 def load_mock_data_from_bigquery() -> dict:
-    with _mock_data_cache_lock:
-        if time.time() - _mock_data_cache["last_updated"] < CACHE_TTL_SECONDS:
-            return _mock_data_cache["data"]
-        client = bigquery.Client(project=PROJECT_ID)
-        query = f"SELECT key, data FROM `{PROJECT_ID}.{DATASET_ID}.{MOCK_DATA_TABLE_ID}`"
-        try:
-            query_job = client.query(query)
-            results = query_job.result()
-            mock_data = {row.key: row.data for row in results}
-            _mock_data_cache["data"] = mock_data
-            _mock_data_cache["last_updated"] = time.time()
-            return mock_data
-        except Exception as e:
-            logger.error(f"An error occurred while loading mock data: {e}")
-            return {}
+    return dashboard_cache.get_or_load(make_key("mock_data"), _query_mock_data, empty=dict)
 
 def load_model_predictions_data() -> pd.DataFrame:
-    with _predictions_cache_lock:
-        if time.time() - _predictions_cache["last_updated"] < CACHE_TTL_SECONDS:
-            return _predictions_cache["data"]
-        client = bigquery.Client(project=PROJECT_ID)
-        query = f"SELECT * FROM `{PROJECT_ID}.{DATASET_ID}.{MODEL_PREDICTIONS_TABLE_ID}`"
-        try:
-            df = client.query(query).to_dataframe()
-            _predictions_cache["data"] = df
-            _predictions_cache["last_updated"] = time.time()
-            return df
-        except Exception as e:
-            logger.error(f"An error occurred while loading predictions data: {e}")
-            return pd.DataFrame()
+    return dashboard_cache.get_or_load(
+        make_key("model_predictions"), _query_model_predictions, empty=pd.DataFrame)
+
+# --- Time-window loaders --- #
+# These tables are day-partitioned on `timestamp`, so the range filter below
+# limits the scan to the partitions inside the window.
+WINDOW_QUERY = """
+    SELECT {columns}
+    FROM {table}
+    WHERE timestamp > @start AND timestamp <= @end
+    ORDER BY timestamp
+"""
+
+def _query_latest_timestamp():
+    storage = get_storage(PROJECT_ID, DATASET_ID)
+    df = storage.query(f"SELECT MAX(timestamp) AS latest FROM {storage.table_ref(SOURCE_TABLE_ID)}")
+    latest = df['latest'].iloc[0] if len(df) else None
+    return None if pd.isna(latest) else pd.Timestamp(latest)
+
+def load_latest_timestamp():
+    """
+    Timestamp of the newest source sample, which anchors every time window.
+    """
+    return dashboard_cache.get_or_load(make_key("latest_timestamp"), _query_latest_timestamp, empty=lambda: None)
+
+def _query_window(table_name, columns, start, end):
+    storage = get_storage(PROJECT_ID, DATASET_ID)
+    sql = WINDOW_QUERY.format(columns=', '.join(columns), table=storage.table_ref(table_name))
+    return storage.query(sql, {"start": start.to_pydatetime(), "end": end.to_pydatetime()})
+
+def load_window(table_name, columns, start, end) -> pd.DataFrame:
+    """
+    Rows of `table_name` with start < timestamp <= end, projected to `columns`.
+
+    Each (table, columns, window) combination is its own cache entry.
+    """
+    columns = tuple(columns)
+    key = make_key("window", table=table_name, columns=columns, start=start, end=end)
+    # A failed load yields an empty frame that still has the requested columns
+    output_columns = [column.split(" AS ")[-1].strip() for column in columns]
+    return dashboard_cache.get_or_load(
+        key, lambda: _query_window(table_name, columns, start, end),
+        empty=lambda: pd.DataFrame(columns=output_columns))
+
+SINCE_QUERY = """
+    SELECT {columns}
+    FROM {table}
+    WHERE timestamp > @since
+    ORDER BY timestamp
+"""
+
+def query_since(table_name, columns, since) -> pd.DataFrame:
+    """
+    Rows of `table_name` newer than `since`, projected to `columns`.
+
+    Not cached: the live feed calls this once per tick with a moving cursor,
+    so every result would be a new, never-reused entry.
+    """
+    storage = get_storage(PROJECT_ID, DATASET_ID)
+    sql = SINCE_QUERY.format(columns=', '.join(columns), table=storage.table_ref(table_name))
+    return storage.query(sql, {"since": since.to_pydatetime()})
@@ -0,0 +1,327 @@
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+import logging
+import sys
+import time
+from threading import Lock
+
+import pandas as pd
+
+# --- Configuration --- #
+DEFAULT_TTL_SECONDS = 60
+DEFAULT_REFRESH_AHEAD_SECONDS = 5
+DEFAULT_MAX_STALE_SECONDS = 600  # Past expiry, how long get_or_load may still serve a value
+DEFAULT_REFRESH_RETRY_SECONDS = 10  # Wait after a failed background refresh before retrying
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# --- Logging --- #
+logger = logging.getLogger(__name__)
+
+_refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+
+def make_key(name, **params):
+    """
+    Builds a hashable cache key from a loader name and its query parameters.
+    """
+    return (name, tuple(sorted(params.items())))
+
+def estimate_size(value):
+    """
+    Rough in-memory size of a cached value in bytes.
+
+    DataFrames and Series are measured with `memory_usage(deep=True)` so object
+    columns count their strings; containers are walked recursively.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+def _same_value(old, new):
+    try:
+        if isinstance(old, (pd.DataFrame, pd.Series)):
+            return type(old) is type(new) and old.equals(new)
+        return bool(old == new)
+    except Exception:
+        return False
+
+class ReadLog:
+    """
+    The cache entries one piece of work read: {key: version}. `complete` is
+    False if any load failed, since that result reflects an error rather
+    than cached data.
+    """
+
+    def __init__(self):
+        self.versions = {}
+        self.complete = True
+
+class _Entry:
+    __slots__ = ("value", "size", "ttl", "expires_at", "refreshing", "retry_at", "loader", "version")
+
+    def __init__(self, value, size, ttl, loader, version):
+        self.value = value
+        self.size = size
+        self.ttl = ttl
+        self.expires_at = time.time() + ttl
+        self.refreshing = False
+        self.retry_at = 0.0
+        self.loader = loader
+        self.version = version
+
+class TTLCache:
+    """
+    Thread-safe TTL cache with byte-bounded LRU eviction.
+
+    Every entry carries its own TTL. When the estimated size of all entries
+    exceeds `max_bytes`, the least recently used ones are evicted. `get_or_load`
+    adds stale-while-revalidate on top: a cold key is loaded once (concurrent
+    callers share that load), and afterwards the cached value is returned
+    immediately while a single background refresh replaces it shortly before,
+    or any time after, it expires. A failed refresh is retried no sooner than
+    `refresh_retry` seconds later, and once a value is more than `max_stale`
+    seconds past its expiry it is no longer served: callers block on a fresh
+    load as for a cold key.
+
+    Every entry has a version drawn from `generation`, a counter that only
+    moves when a key is stored with a value different from the one it
+    replaces. Versions therefore identify the data itself, and callers can
+    derive validators such as HTTP ETags from them (see `track_reads`).
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, default_ttl=DEFAULT_TTL_SECONDS,
+                 refresh_ahead=DEFAULT_REFRESH_AHEAD_SECONDS, name="cache",
+                 max_stale=DEFAULT_MAX_STALE_SECONDS, refresh_retry=DEFAULT_REFRESH_RETRY_SECONDS):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.refresh_ahead = refresh_ahead
+        self.max_stale = max_stale
+        self.refresh_retry = refresh_retry
+        self.name = name
+        self._entries = OrderedDict()
+        self._pending = {}
+        # Set by track_reads for the duration of one tracked block
+        self._read_log = ContextVar(f"{name}_read_log", default=None)
+        self._lock = Lock()
+        self._size = 0
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refresh_errors = 0
+
+    # --- Basic operations --- #
+
+    def get(self, key, default=None):
+        """
+        Returns the value for `key` if it is present and not expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= time.time():
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def set(self, key, value, ttl=None):
+        size = estimate_size(value)
+        with self._lock:
+            previous = self._entries.get(key)
+        unchanged_from = previous if previous is not None and _same_value(previous.value, value) else None
+        with self._lock:
+            self._store(key, value, size, self.default_ttl if ttl is None else ttl, unchanged_from=unchanged_from)
+
+    def invalidate(self, key):
+        """
+        Drops a single key. Returns True if it was cached.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return False
+            self._size -= entry.size
+            return True
+
+    def invalidate_prefix(self, name):
+        """
+        Drops every key built by `make_key(name, ...)`, i.e. all parameter
+        variants of one loader. Returns the number of entries removed.
+        """
+        with self._lock:
+            keys = [k for k in self._entries if isinstance(k, tuple) and k and k[0] == name]
+            for key in keys:
+                self._size -= self._entries.pop(key).size
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "name": self.name,
+                "entries": len(self._entries),
+                "generation": self.generation,
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "refresh_errors": self.refresh_errors,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    # --- Stale-while-revalidate --- #
+
+    def get_or_load(self, key, loader, ttl=None, empty=None):
+        """
+        Returns the cached value for `key`, calling `loader()` on a cold miss
+        or when the cached value is more than `max_stale` seconds past expiry.
+
+        If the cold load fails, the error is logged, nothing is cached and
+        `empty()` is returned (or re-raised when `empty` is None).
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        log = self._read_log.get()
+        with self._lock:
+            entry = self._entries.get(key)
+            now = time.time()
+            if entry is not None and not self._too_stale(entry, now):
+                self._touch(key, entry, now)
+                self.hits += 1
+                if log is not None:
+                    log.versions[key] = entry.version
+                return entry.value
+            self.misses += 1
+            future = self._pending.get(key)
+            owner = future is None
+            if owner:
+                future = self._pending[key] = Future()
+
+        if owner:
+            try:
+                value = loader()
+                size = estimate_size(value)
+                # Compared here, outside the lock, against the too-stale entry if any
+                unchanged_from = entry if entry is not None and _same_value(entry.value, value) else None
+                with self._lock:
+                    version = self._store(key, value, size, ttl, loader, unchanged_from)
+                future.set_result((value, version))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    self._pending.pop(key, None)
+
+        try:
+            value, version = future.result()
+        except Exception as e:
+            if log is not None:
+                log.complete = False
+            if empty is None:
+                raise
+            logger.error(f"An error occurred while loading {key!r} into {self.name}: {e}")
+            return empty()
+        if log is not None:
+            log.versions[key] = version
+        return value
+
+    # --- Versions --- #
+
+    @contextmanager
+    def track_reads(self):
+        """
+        Records the key and version of every `get_or_load` made by this
+        thread or task inside the block into the yielded ReadLog.
+        """
+        log = ReadLog()
+        token = self._read_log.set(log)
+        try:
+            yield log
+        finally:
+            self._read_log.reset(token)
+
+    def versions(self, keys):
+        """
+        Current {key: version} for `keys`, or None if any of them is no longer
+        cached. Counts as a read: due entries start their background refresh,
+        so callers that answer from versions alone still see data advance.
+        """
+        now = time.time()
+        with self._lock:
+            current = {}
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None or self._too_stale(entry, now):
+                    return None
+                self._touch(key, entry, now)
+                current[key] = entry.version
+            return current
+
+    def _too_stale(self, entry, now):
+        return now > entry.expires_at + self.max_stale
+
+    def _touch(self, key, entry, now):
+        # Caller holds self._lock
+        self._entries.move_to_end(key)
+        if entry.loader is not None and not entry.refreshing and now >= entry.retry_at \
+                and entry.expires_at - now <= min(self.refresh_ahead, entry.ttl):
+            entry.refreshing = True
+            _refresh_executor.submit(self._refresh, key, entry, entry.loader, entry.ttl)
+
+    def _refresh(self, key, entry, loader, ttl):
+        try:
+            value = loader()
+            size = estimate_size(value)
+            # Entries are never mutated, so entry.value can be compared without the lock
+            unchanged_from = entry if _same_value(entry.value, value) else None
+            with self._lock:
+                # Skip the write if the key was invalidated or replaced meanwhile
+                if self._entries.get(key) is entry:
+                    self._store(key, value, size, ttl, loader, unchanged_from)
+        except Exception as e:
+            logger.error(f"An error occurred while refreshing {key!r} in {self.name}: {e}")
+            with self._lock:
+                self.refresh_errors += 1
+                entry.refreshing = False
+                entry.retry_at = time.time() + self.refresh_retry
+
+    def _store(self, key, value, size, ttl, loader=None, unchanged_from=None):
+        # Caller holds self._lock; returns the version the value is stored under.
+        # `unchanged_from` is the entry the caller found equal to `value`: the
+        # comparison (DataFrame.equals on large frames) runs before taking the
+        # lock, and its version is kept only if that entry is still current
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._size -= old.size
+        if old is not None and old is unchanged_from:
+            version = old.version
+        else:
+            self.generation += 1
+            version = self.generation
+        if size > self.max_bytes:
+            logger.warning(f"Not caching {key!r} in {self.name}: {size} bytes exceeds max_bytes={self.max_bytes}.")
+            return version
+        self._entries[key] = _Entry(value, size, ttl, loader, version)
+        self._size += size
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= evicted.size
+            self.evictions += 1
+        return version
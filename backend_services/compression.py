@@ -0,0 +1,128 @@
+import gzip
+import os
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; without it only gzip is offered
+    brotli = None
+
+# --- Configuration --- #
+# Bodies smaller than this go out uncompressed; headers and CPU outweigh the saving
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))  # 1 (fastest) to 9 (smallest)
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))  # 0 (fastest) to 11 (smallest)
+
+COMPRESSIBLE_TYPES = ("application/json", "application/javascript", "text/")
+# Streams must reach the client event by event, not once the buffer fills
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+
+def supported_encodings():
+    # In order of preference when the client weighs them equally
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+def negotiate(accept_encoding):
+    """
+    Picks the encoding to use for an Accept-Encoding header, or None for
+    identity. Honours q-values, including q=0 and the "*" wildcard.
+    """
+    weights = {}
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding] = q
+
+    best, best_q = None, 0.0
+    for coding in supported_encodings():
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+def compress(body, encoding, gzip_level=GZIP_LEVEL, brotli_quality=BROTLI_QUALITY):
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    if encoding == "gzip":
+        # mtime=0 keeps the output deterministic for identical bodies
+        return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+    raise ValueError(f"Unsupported content encoding '{encoding}'.")
+
+def is_compressible(content_type):
+    content_type = (content_type or "").lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES) and not content_type.startswith(UNCOMPRESSED_TYPES)
+
+class CompressionMiddleware:
+    """
+    ASGI middleware that gzip- or brotli-encodes response bodies according to
+    the request's Accept-Encoding.
+
+    Only complete single-message bodies of at least `minimum_size` bytes with
+    a text or JSON content type are compressed. Streamed responses (no
+    Content-Length), other content types and responses that already carry a
+    Content-Encoding (such as the pre-encoded variants served by
+    ConditionalResponder) pass through untouched, with their headers sent
+    as soon as the application starts the response.
+    """
+
+    def __init__(self, app, minimum_size=COMPRESSION_MIN_BYTES, gzip_level=GZIP_LEVEL,
+                 brotli_quality=BROTLI_QUALITY):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                # Streamed bodies have no Content-Length up front
+                if "content-encoding" in headers or "content-length" not in headers \
+                        or not is_compressible(headers.get("content-type")) or message["status"] in (204, 304):
+                    # Decided from the headers alone, so event streams start at once
+                    await send(message)
+                else:
+                    # Held back until the first body chunk shows whether to compress
+                    start = message
+                return
+            if start is None or message["type"] != "http.response.body":
+                if start is not None:
+                    await send(start)
+                    start = None
+                await send(message)
+                return
+
+            response_start, start = start, None
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                await send(response_start)
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=response_start["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if encoding is not None:
+                body = compress(body, encoding, self.gzip_level, self.brotli_quality)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+            await send(response_start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,225 @@
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend_services.bigquery_client import (
+    ALERTS_TABLE_ID,
+    MODEL_PREDICTIONS_TABLE_ID,
+    SOURCE_TABLE_ID,
+    load_latest_timestamp,
+    load_window,
+)
+from backend_services.downsampling import DEFAULT_TREND_POINTS, downsample_frame
+from kiln_storage.rollups import ROLLUP_STEPS, rollup_table_id
+
+# --- Configuration --- #
+TIMERANGE_PATTERN = re.compile(r"^(\d+)([mhdw])$")
+TIMERANGE_UNITS = {"m": "min", "h": "h", "d": "D", "w": "W"}
+MAX_TIMERANGE = pd.Timedelta(days=365)
+RECENT_ALERTS_LIMIT = 5
+CORRELATION_POINTS = 200
+TREND_STABLE_TOLERANCE = 0.01  # Relative change below which a KPI trend is "stable"
+# Current values, daily averages and KPI trends come from at most this much raw data
+KPI_WINDOW = pd.Timedelta(days=1)
+
+# Sensors each endpoint reads
+KILN_HEALTH_TREND_SENSORS = ['kiln_temperature', 'pressure', 'oxygen']
+KILN_HEALTH_KPI_COLUMNS = ['timestamp', 'kiln_temperature', 'fuel_consumption']
+ENERGY_COCKPIT_TREND_SENSORS = ['fuel_consumption']
+ENERGY_COCKPIT_KPI_COLUMNS = ['timestamp', 'fuel_consumption', 'specific_energy_consumption']
+CORRELATION_SENSORS = ['kiln_temperature', 'actual_fcao']
+PREDICTION_COLUMNS = ['timestamp', 'predicted_fcao', 'prediction_confidence']
+ALERT_COLUMNS = ['timestamp', 'id', 'type', 'message']
+
+def parse_timerange(timerange):
+    """
+    Parses a dashboard range such as "30m", "24h", "7d" or "2w" into a Timedelta.
+    """
+    match = TIMERANGE_PATTERN.match(timerange or "")
+    if not match:
+        raise ValueError(f"Invalid timerange '{timerange}', expected e.g. '24h' or '7d'.")
+    delta = pd.Timedelta(int(match.group(1)), unit=TIMERANGE_UNITS[match.group(2)])
+    if not pd.Timedelta(0) < delta <= MAX_TIMERANGE:
+        raise ValueError(f"timerange must be between 1m and {MAX_TIMERANGE.days}d.")
+    return delta
+
+def resolve_window(timerange):
+    """
+    Returns (start, end) for `timerange`, ending at the newest sample, or None
+    when no data is available.
+    """
+    delta = parse_timerange(timerange)
+    end = load_latest_timestamp()
+    if end is None:
+        return None
+    return end - delta, end
+
+def pick_resolution(span, min_points):
+    """
+    Returns the coarsest rollup resolution that still yields `min_points`
+    buckets over `span`, or None when only raw data is dense enough.
+    """
+    if min_points is None:
+        return None
+    for resolution, step in ROLLUP_STEPS:
+        if span / step >= min_points:
+            return resolution
+    return None
+
+def load_sensor_trend(sensors, start, end, min_points):
+    """
+    Per-sensor series over the window, read from the coarsest rollup that
+    meets `min_points` (bucket means, labelled by bucket start) so long ranges
+    never scan minute data. Falls back to raw samples when no rollup fits or
+    the rollup tables have not been built. When the rollup lags the source,
+    raw samples past its last complete bucket fill the rest of the window.
+    """
+    raw_columns = ['timestamp'] + list(sensors)
+    resolution = pick_resolution(end - start, min_points)
+    if resolution is not None:
+        columns = ['timestamp'] + [f"{sensor}_mean AS {sensor}" for sensor in sensors]
+        df = load_window(rollup_table_id(resolution), columns, start, end)
+        if not df.empty:
+            last_bucket = df['timestamp'].iloc[-1]
+            covered_until = last_bucket + dict(ROLLUP_STEPS)[resolution]
+            if covered_until > end:
+                return df
+            # Keyed on the last bucket so the tail's cache entry lives until the rollup moves on
+            tail = load_window(SOURCE_TABLE_ID, raw_columns, last_bucket, end)
+            tail = tail[tail['timestamp'] >= covered_until]
+            return pd.concat([df, tail], ignore_index=True) if len(tail) else df
+    return load_window(SOURCE_TABLE_ID, raw_columns, start, end)
+
+def _load_kpis(columns, start, end):
+    return load_window(SOURCE_TABLE_ID, columns, max(start, end - KPI_WINDOW), end)
+
+def _time_labels(timestamps, span):
+    fmt = "%H:%M" if span <= pd.Timedelta(days=1) else "%m-%d %H:%M"
+    return pd.DatetimeIndex(timestamps).strftime(fmt).tolist()
+
+def _iso(timestamp):
+    return pd.Timestamp(timestamp).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def _trend(series):
+    mean = series.mean()
+    change = (series.iloc[-1] - mean) / abs(mean) if mean else 0.0
+    if change > TREND_STABLE_TOLERANCE:
+        return "up"
+    if change < -TREND_STABLE_TOLERANCE:
+        return "down"
+    return "stable"
+
+def _round(values, digits=2):
+    return np.round(np.asarray(values, dtype=float), digits).tolist()
+
+# --- Section builders --- #
+# Each builder returns `fallback` unchanged when the window has no data, so the
+# dashboard keeps working without a populated dataset. Trend arrays come from
+# the coarsest adequate rollup and are reduced to at most `max_points` with
+# LTTB; KPIs are computed from the last KPI_WINDOW of raw samples.
+
+def build_kiln_health(timerange, fallback, max_points=DEFAULT_TREND_POINTS):
+    window = resolve_window(timerange)
+    if window is None:
+        return fallback
+    start, end = window
+    kpis = _load_kpis(KILN_HEALTH_KPI_COLUMNS, start, end)
+    if kpis.empty:
+        return fallback
+    alerts = load_window(ALERTS_TABLE_ID, ALERT_COLUMNS, start, end)
+
+    latest = kpis.iloc[-1]
+    if (alerts['type'] == "Critical").any():
+        status = "Critical"
+    elif len(alerts):
+        status = "Warning"
+    else:
+        status = "Normal"
+    recent = alerts.iloc[::-1].head(RECENT_ALERTS_LIMIT)
+    trend = load_sensor_trend(KILN_HEALTH_TREND_SENSORS, start, end, max_points)
+    trend = downsample_frame(trend, 'timestamp', KILN_HEALTH_TREND_SENSORS, max_points)
+    labels = _time_labels(trend['timestamp'], end - start)
+    return {
+        "status": status,
+        "operational_parameters": {
+            "fuel_consumption": {"value": round(float(latest['fuel_consumption']), 2), "unit": "t/h"},
+            "kiln_temp": {"value": round(float(latest['kiln_temperature']), 1), "unit": "°C"},
+        },
+        "trends": [
+            {"time": label, "temp": temp, "pressure": pressure, "oxygen": oxygen}
+            for label, temp, pressure, oxygen in zip(
+                labels, _round(trend['kiln_temperature'], 1), _round(trend['pressure']), _round(trend['oxygen'])
+            )
+        ],
+        "recent_alerts": [
+            {"id": int(row.id), "type": row.type, "message": row.message, "timestamp": _iso(row.timestamp)}
+            for row in recent.itertuples(index=False)
+        ],
+    }
+
+def build_energy_cockpit(timerange, fallback, max_points=DEFAULT_TREND_POINTS):
+    window = resolve_window(timerange)
+    if window is None:
+        return fallback
+    start, end = window
+    kpis = _load_kpis(ENERGY_COCKPIT_KPI_COLUMNS, start, end)
+    if kpis.empty:
+        return fallback
+
+    trend = load_sensor_trend(ENERGY_COCKPIT_TREND_SENSORS, start, end, max_points)
+    trend = downsample_frame(trend, 'timestamp', ENERGY_COCKPIT_TREND_SENSORS, max_points)
+    labels = _time_labels(trend['timestamp'], end - start)
+    # Cost and emissions have no source table yet and keep their fallback values
+    return {
+        **fallback,
+        "fuel_consumption": {
+            "currentRate": round(float(kpis['fuel_consumption'].iloc[-1]), 2),
+            "trend": _trend(kpis['fuel_consumption']),
+            "dailyAverage": round(float(kpis['fuel_consumption'].mean()), 2),
+        },
+        "energy_efficiency": {
+            **fallback.get("energy_efficiency", {}),
+            "sec": round(float(kpis['specific_energy_consumption'].iloc[-1]), 1),
+            "trend": _trend(kpis['specific_energy_consumption']),
+        },
+        "trends": [
+            {"name": label, "consumption": value}
+            for label, value in zip(labels, _round(trend['fuel_consumption']))
+        ],
+    }
+
+def build_predictive_quality(timerange, fallback, max_points=DEFAULT_TREND_POINTS):
+    window = resolve_window(timerange)
+    if window is None:
+        return fallback
+    start, end = window
+    predictions = load_window(MODEL_PREDICTIONS_TABLE_ID, PREDICTION_COLUMNS, start, end)
+    if predictions.empty:
+        return fallback
+    source = load_sensor_trend(CORRELATION_SENSORS, start, end, CORRELATION_POINTS)
+
+    latest = predictions.iloc[-1]
+    # An evenly spaced sample is enough for the scatter plot
+    step = max(1, len(source) // CORRELATION_POINTS)
+    sample = source.iloc[::step]
+    trend = downsample_frame(predictions, 'timestamp', ['predicted_fcao'], max_points)
+    labels = _time_labels(trend['timestamp'], end - start)
+    return {
+        **fallback,
+        "predicted_fcao": round(float(latest['predicted_fcao']), 2),
+        "confidence_interval": f"{float(latest['prediction_confidence']):.0%}",
+        "trends": [
+            {"name": label, "fcao": value}
+            for label, value in zip(labels, _round(trend['predicted_fcao']))
+        ],
+        "correlation_data": [
+            {"temp": temp, "fcao": fcao}
+            for temp, fcao in zip(_round(sample['kiln_temperature'], 1), _round(sample['actual_fcao']))
+        ],
+    }
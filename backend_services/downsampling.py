@@ -0,0 +1,65 @@
+import numpy as np
+
+# --- Configuration --- #
+DEFAULT_TREND_POINTS = 500  # Roughly the pixel width of a dashboard chart
+MIN_TREND_POINTS = 3  # LTTB always keeps the first and last point plus one per bucket
+
+def lttb_indices(x, y, max_points):
+    """
+    Largest-Triangle-Three-Buckets: returns the sorted indices of at most
+    `max_points` samples that preserve the visual shape of the series.
+
+    `y` may be 2-D (one column per series) to pick one shared set of points
+    for several series drawn against the same x axis. Each column is scaled
+    to its own range first so no series dominates the triangle areas.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if y.ndim == 1:
+        y = y[:, None]
+    n = len(x)
+    if max_points >= n or n <= MIN_TREND_POINTS:
+        return np.arange(n)
+    if max_points < MIN_TREND_POINTS:
+        raise ValueError(f"max_points must be at least {MIN_TREND_POINTS}.")
+
+    span = np.ptp(y, axis=0)
+    y = (y - y.min(axis=0)) / np.where(span > 0, span, 1.0)
+    x = (x - x[0]) / ((x[-1] - x[0]) or 1.0)
+
+    # Interior points split into max_points - 2 buckets; edges[i]:edges[i + 1] is bucket i
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    counts = np.diff(edges)
+    # Bucket averages, used as the third triangle vertex for the bucket before
+    avg_x = np.add.reduceat(x[:-1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[:-1], edges[:-1], axis=0) / counts[:, None]
+    avg_x = np.append(avg_x, x[-1])
+    avg_y = np.vstack([avg_y, y[-1]])
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for bucket in range(max_points - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        bx = x[lo:hi]
+        by = y[lo:hi]
+        cx, cy = avg_x[bucket + 1], avg_y[bucket + 1]
+        ax, ay = x[a], y[a]
+        # Twice the triangle area per series, summed across series
+        areas = np.abs((ax - cx) * (by - ay) - (ax - bx)[:, None] * (cy - ay)).sum(axis=1)
+        a = lo + int(np.argmax(areas))
+        selected[bucket + 1] = a
+    return selected
+
+def downsample_frame(df, x_column, y_columns, max_points):
+    """
+    Returns the rows of `df` that LTTB keeps for `y_columns` plotted against
+    `x_column`. Datetime x columns are compared as nanoseconds.
+    """
+    if max_points is None or len(df) <= max_points:
+        return df
+    x = df[x_column]
+    x = x.to_numpy(dtype="datetime64[ns]").astype(np.int64) if hasattr(x, "dt") else x.to_numpy()
+    indices = lttb_indices(x, df[list(y_columns)].to_numpy(dtype=float), max_points)
+    return df.iloc[indices]
@@ -0,0 +1,121 @@
+from hashlib import blake2b
+from typing import Any
+import os
+import uuid
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+import orjson
+
+from backend_services.cache import TTLCache
+from backend_services.compression import COMPRESSION_MIN_BYTES, compress, negotiate
+
+# --- Configuration --- #
+# Seconds a browser may reuse a dashboard response before revalidating it
+DASHBOARD_MAX_AGE_SECONDS = int(os.getenv("DASHBOARD_MAX_AGE_SECONDS", "0"))
+# Memory bound for rendered response bodies across all endpoints and queries
+RENDERED_CACHE_MAX_BYTES = int(os.getenv("RENDERED_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+# Rendered bodies are validated against entry versions, so the TTL only ages out unused ones
+RENDERED_CACHE_TTL_SECONDS = 3600
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+# Entry versions restart with the process, so ETags carry a per-process id
+_BOOT_ID = uuid.uuid4().hex[:8]
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+class OrjsonResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson; the app's default response class.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def _etag_matches(if_none_match, etag):
+    # If-None-Match uses weak comparison: W/"x" matches "x"
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+class ConditionalResponder:
+    """
+    Serves endpoints whose payloads are built from a TTLCache as pre-rendered
+    JSON with ETag / If-None-Match support.
+
+    While a payload is built, the cache records which entries it read and at
+    which version. The payload is serialized once with orjson and kept, with
+    those versions, in a byte-bounded cache of rendered bodies keyed by path
+    and query. As long as none of those entries has a new version, later
+    requests get the stored bytes (or a 304 Not Modified when their
+    If-None-Match matches), with no rebuild and no re-encode. Checking the
+    versions counts as a cache read, so due entries keep refreshing in the
+    background. Payloads built after a failed load are sent with no-store
+    and are never kept.
+
+    Bodies of at least `min_compress_bytes` are also kept gzip- or
+    brotli-encoded, per encoding and ETag, so each one is compressed once per
+    data version rather than once per request.
+    """
+
+    def __init__(self, cache, max_age=DASHBOARD_MAX_AGE_SECONDS, max_bytes=RENDERED_CACHE_MAX_BYTES,
+                 min_compress_bytes=COMPRESSION_MIN_BYTES):
+        self.cache = cache
+        self.min_compress_bytes = min_compress_bytes
+        self.cache_control = f"private, max-age={max_age}, must-revalidate"
+        self.rendered = TTLCache(max_bytes=max_bytes, default_ttl=RENDERED_CACHE_TTL_SECONDS,
+                                 refresh_ahead=0, name="rendered_responses")
+
+    def _representation(self, request):
+        return request.url.path, tuple(sorted(request.query_params.multi_items()))
+
+    def _etag(self, representation, versions):
+        state = repr((representation, sorted(map(repr, versions.items()))))
+        return f'W/"{_BOOT_ID}-{blake2b(state.encode(), digest_size=12).hexdigest()}"'
+
+    def _encoded(self, request, representation, body, etag):
+        # Returns (body, headers) in the best encoding the client accepts
+        encoding = negotiate(request.headers.get("accept-encoding"))
+        if encoding is None or len(body) < self.min_compress_bytes:
+            return body, {}
+        key = (representation, encoding)
+        variant = self.rendered.get(key)
+        if variant is None or variant[0] != etag:
+            variant = (etag, compress(body, encoding))
+            self.rendered.set(key, variant)
+        return variant[1], {"Content-Encoding": encoding}
+
+    def _send(self, request, representation, body, etag):
+        headers = {"ETag": etag, "Cache-Control": self.cache_control}
+        if len(body) >= self.min_compress_bytes:
+            headers["Vary"] = "Accept-Encoding"
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        body, encoding_headers = self._encoded(request, representation, body, etag)
+        return Response(content=body, media_type="application/json", headers={**headers, **encoding_headers})
+
+    def respond(self, request, build):
+        """
+        Returns a Response for `build()`'s payload, reusing the rendered body
+        while the cache entries behind it are unchanged.
+        """
+        representation = self._representation(request)
+        # Stored as a (versions, body, etag) tuple so its size counts the body
+        rendered = self.rendered.get(representation)
+        if rendered is not None:
+            versions, body, etag = rendered
+            if self.cache.versions(versions) == versions:
+                return self._send(request, representation, body, etag)
+
+        with self.cache.track_reads() as reads:
+            payload = build()
+        body = dumps(payload)
+        if not reads.complete:
+            return Response(content=body, media_type="application/json", headers={"Cache-Control": "no-store"})
+        etag = self._etag(representation, reads.versions)
+        self.rendered.set(representation, (reads.versions, body, etag))
+        return self._send(request, representation, body, etag)
@@ -0,0 +1,284 @@
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+import asyncio
+import copy
+import logging
+import os
+import sys
+
+import pandas as pd
+from starlette.websockets import WebSocketDisconnect
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend_services.anomaly_detector import METRICS_TO_ANALYZE, ROLLING_WINDOW_SIZE, KilnAnomalyDetector
+from backend_services.bigquery_client import ALERTS_TABLE_ID, SOURCE_TABLE_ID, load_latest_timestamp, query_since
+from backend_services.dashboard_data import ALERT_COLUMNS
+from backend_services.http_caching import dumps
+
+# --- Configuration --- #
+LIVE_POLL_INTERVAL_SECONDS = float(os.getenv("LIVE_POLL_INTERVAL_SECONDS", "5"))
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", "32"))  # Pending events per client
+LIVE_HEARTBEAT_SECONDS = 15  # Keeps idle connections open through proxies
+LIVE_BACKFILL = pd.Timedelta(minutes=15)  # Samples sent on the first tick
+# History replayed through the anomaly detector on the first tick, so flags
+# start with a full rolling window (one sample per minute)
+LIVE_DETECTOR_WARMUP = pd.Timedelta(minutes=ROLLING_WINDOW_SIZE)
+MAX_MERGED_SAMPLES = 500  # Sample rows a slow client's merged update keeps
+
+LIVE_SAMPLE_COLUMNS = ['timestamp', 'kiln_temperature', 'pressure', 'oxygen',
+                       'fuel_consumption', 'specific_energy_consumption']
+# Read from the source for the detector but not sent to clients
+DETECTOR_ONLY_COLUMNS = [metric for metric in METRICS_TO_ANALYZE if metric not in LIVE_SAMPLE_COLUMNS]
+# Event types whose latest value is replayed to clients as they connect
+SNAPSHOT_TYPES = ("kpis",)
+# Event types a slow client may lose; alerts are never dropped
+DROPPABLE_TYPES = ("samples", "kpis")
+
+# --- Logging --- #
+logger = logging.getLogger(__name__)
+
+class LiveEvent:
+    """
+    One update pushed to clients. Events with the same `key` supersede each
+    other in a slow client's queue. The JSON message is encoded once and
+    shared by every subscriber.
+    """
+    __slots__ = ("id", "type", "key", "data", "_message")
+
+    def __init__(self, id, type, key, data):
+        self.id = id
+        self.type = type
+        self.key = key
+        self.data = data
+        self._message = None
+
+    @property
+    def message(self):
+        if self._message is None:
+            self._message = dumps({"id": self.id, "type": self.type, "data": self.data})
+        return self._message
+
+    def sse_frame(self):
+        return b"id: %d\nevent: %s\ndata: %s\n\n" % (self.id, self.type.encode(), self.message)
+
+def merge_events(pending, event):
+    """
+    Combines an event still queued for a client with a newer one for the same
+    key. Sample batches are concatenated (keeping the newest rows); any other
+    event is replaced by its newer value.
+    """
+    if event.type == "samples":
+        rows = (pending.data + event.data)[-MAX_MERGED_SAMPLES:]
+        return LiveEvent(event.id, event.type, event.key, rows)
+    return event
+
+class Subscription:
+    """
+    Bounded per-client event queue.
+
+    A new event replaces (or merges into) a queued event with the same key,
+    so a client that falls behind receives the latest state rather than a
+    backlog. When more than `maxsize` keys are pending, the oldest samples or
+    KPI update is dropped. Alerts are never dropped: if only alerts are left
+    to drop, the subscription is marked `overflowed` and the transport closes
+    the connection, so the client reconnects rather than missing an alert.
+    """
+
+    def __init__(self, maxsize=LIVE_QUEUE_SIZE):
+        self.maxsize = maxsize
+        self.dropped = 0
+        self.merged = 0
+        self.overflowed = False
+        self._events = OrderedDict()
+        self._ready = asyncio.Event()
+
+    def put(self, event):
+        if self.overflowed:
+            return
+        pending = self._events.pop(event.key, None)
+        if pending is not None:
+            event = merge_events(pending, event)
+            self.merged += 1
+        self._events[event.key] = event
+        while len(self._events) > self.maxsize:
+            droppable = next((key for key, queued in self._events.items() if queued.type in DROPPABLE_TYPES), None)
+            if droppable is None:
+                self.overflowed = True
+                break
+            del self._events[droppable]
+            self.dropped += 1
+        self._ready.set()
+
+    async def get(self, timeout=None):
+        """
+        Returns the oldest pending event, or None if none arrives within
+        `timeout` seconds or the subscription has overflowed.
+        """
+        if self.overflowed:
+            return None
+        while not self._events:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        _, event = self._events.popitem(last=False)
+        return event
+
+class TelemetryHub:
+    """
+    Fans out one upstream producer to any number of streaming clients.
+
+    `poll(cursor)` is a blocking callable returning ([(type, key, data)],
+    next_cursor) for whatever is new past `cursor` (None on the first call).
+    A single task runs it on the thread pool every `interval` seconds while
+    at least one client is subscribed, and publishes each result to every
+    subscription, so upstream load depends on the data rate and not on the
+    number of clients. The hub keeps the cursor and only advances it once a
+    poll's updates are published, so a poll abandoned when the last client
+    leaves is simply repeated on the next start.
+    """
+
+    def __init__(self, poll, interval=LIVE_POLL_INTERVAL_SECONDS, queue_size=LIVE_QUEUE_SIZE):
+        self.poll = poll
+        self.interval = interval
+        self.queue_size = queue_size
+        self.cursor = None
+        self.published = 0
+        self._subscribers = set()
+        self._snapshot = {}
+        self._task = None
+
+    def publish(self, type, key, data):
+        self.published += 1
+        event = LiveEvent(self.published, type, key, data)
+        if type in SNAPSHOT_TYPES:
+            self._snapshot[key] = event
+        for subscription in self._subscribers:
+            subscription.put(event)
+
+    @asynccontextmanager
+    async def subscribe(self):
+        subscription = Subscription(self.queue_size)
+        for event in self._snapshot.values():
+            subscription.put(event)
+        self._subscribers.add(subscription)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        try:
+            yield subscription
+        finally:
+            self._subscribers.discard(subscription)
+            if not self._subscribers and self._task is not None:
+                self._task.cancel()
+                self._task = None
+
+    def stats(self):
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "dropped": sum(s.dropped for s in self._subscribers),
+            "merged": sum(s.merged for s in self._subscribers),
+        }
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                updates, cursor = await loop.run_in_executor(None, self.poll, self.cursor)
+            except Exception as e:
+                logger.error(f"Live telemetry poll failed: {e}")
+            else:
+                for type, key, data in updates:
+                    self.publish(type, key, data)
+                self.cursor = cursor
+            await asyncio.sleep(self.interval)
+
+def _iso(timestamp):
+    return pd.Timestamp(timestamp).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+class KilnTelemetrySource:
+    """
+    Polls the source and alerts tables for rows past a cursor of
+    (last sample timestamp, last alert timestamp, anomaly detector). Yields
+    "samples" (new sensor rows), "kpis" (the latest values) and one "alert"
+    event per new alert. Every sample row carries an "anomalies" list of the
+    metrics the streaming detector flags on it.
+
+    Holds no state: the caller keeps the cursor. The detector travels in the
+    cursor and is copied before new samples go through it, so a poll whose
+    result is discarded leaves the caller's detector untouched.
+    """
+
+    def __init__(self, backfill=LIVE_BACKFILL, warmup=LIVE_DETECTOR_WARMUP):
+        self.backfill = backfill
+        self.warmup = max(warmup, backfill)
+
+    def __call__(self, cursor=None):
+        send_after = None
+        if cursor is None:
+            latest = load_latest_timestamp()
+            if latest is None:
+                return [], None
+            send_after = latest - self.backfill
+            cursor = (latest - self.warmup, send_after, KilnAnomalyDetector())
+        sample_cursor, alert_cursor, detector = cursor
+
+        updates = []
+        samples = query_since(SOURCE_TABLE_ID, LIVE_SAMPLE_COLUMNS + DETECTOR_ONLY_COLUMNS, sample_cursor)
+        if len(samples):
+            sample_cursor = samples['timestamp'].iloc[-1]
+            detector = copy.deepcopy(detector)
+            flags = detector.update_batch(samples[METRICS_TO_ANALYZE].to_dict(orient="records"))
+            anomalies = pd.Series([[metric for metric, flagged in row.items() if flagged] for row in flags],
+                                  index=samples.index)
+            if send_after is not None:
+                # Warm-up rows only prime the detector
+                anomalies = anomalies[samples['timestamp'] > send_after]
+                samples = samples.loc[anomalies.index]
+            if len(samples):
+                rows = samples[LIVE_SAMPLE_COLUMNS].assign(timestamp=samples['timestamp'].map(_iso)).round(2)
+                rows['anomalies'] = anomalies
+                updates.append(("samples", "samples", rows.to_dict(orient="records")))
+                updates.append(("kpis", "kpis", rows.iloc[-1].to_dict()))
+
+        alerts = query_since(ALERTS_TABLE_ID, ALERT_COLUMNS, alert_cursor)
+        if len(alerts):
+            alert_cursor = alerts['timestamp'].iloc[-1]
+        for row in alerts.itertuples(index=False):
+            updates.append(("alert", ("alert", int(row.id)), {
+                "id": int(row.id), "type": row.type, "message": row.message, "timestamp": _iso(row.timestamp),
+            }))
+        return updates, (sample_cursor, alert_cursor, detector)
+
+# --- Transports --- #
+
+async def sse_events(hub):
+    """
+    Server-sent events for one client, for use with a StreamingResponse.
+    """
+    async with hub.subscribe() as subscription:
+        # Ending the stream on overflow makes EventSource reconnect
+        while not subscription.overflowed:
+            event = await subscription.get(LIVE_HEARTBEAT_SECONDS)
+            yield event.sse_frame() if event is not None else b": keep-alive\n\n"
+
+async def serve_websocket(hub, websocket):
+    """
+    Pushes the same events as `sse_events` over an accepted WebSocket.
+    """
+    async with hub.subscribe() as subscription:
+        try:
+            while not subscription.overflowed:
+                event = await subscription.get(LIVE_HEARTBEAT_SECONDS)
+                if subscription.overflowed:
+                    # 1013 "try again later": the client reconnects and resyncs
+                    await websocket.close(code=1013)
+                elif event is None:
+                    await websocket.send_text('{"type":"heartbeat"}')
+                else:
+                    await websocket.send_text(event.message.decode())
+        except WebSocketDisconnect:
+            pass
@@ -1,8 +1,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .api import router as api_router
+from .compression import CompressionMiddleware
+from .http_caching import OrjsonResponse
 
-app = FastAPI()
+app = FastAPI(default_response_class=OrjsonResponse)
 
 # Set up CORS
 origins = [
@@ -18,6 +20,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Trend and variance payloads are large and compress well; thresholds and
+# levels are read from COMPRESSION_MIN_BYTES, GZIP_LEVEL and BROTLI_QUALITY
+app.add_middleware(CompressionMiddleware)
+
 app.include_router(api_router, prefix="/api")
 
 @app.get("/")
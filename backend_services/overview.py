@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable
+import asyncio
+import logging
+import os
+
+# --- Configuration --- #
+SECTION_TIMEOUT_SECONDS = float(os.getenv("OVERVIEW_SECTION_TIMEOUT_SECONDS", "2.0"))
+
+# --- Logging --- #
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Section:
+    name: str
+    load: Callable[[], Any]
+    timeout: float = SECTION_TIMEOUT_SECONDS
+    fallback: Any = None
+
+class OverviewAggregator:
+    """
+    Loads the dashboard sections of /overview concurrently.
+
+    Each section's blocking loader runs on the aggregator's own thread pool
+    and is awaited for at most its own timeout. A section that times out or
+    raises is served from its last successful value (or its fallback before
+    it has ever loaded), so one slow query degrades a single card instead of
+    the page. A loader that finishes after its timeout still refreshes that
+    last value.
+
+    Each section has at most one load in flight: while a previous load is
+    still running, later requests wait on it instead of starting another, so
+    a hung query holds one thread rather than one per poll.
+    """
+
+    def __init__(self, sections):
+        self.sections = list(sections)
+        self._last_good = {}
+        self._in_flight = {}
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(self.sections)),
+                                            thread_name_prefix="overview")
+
+    def _remember(self, name, future):
+        if not future.cancelled() and future.exception() is None:
+            self._last_good[name] = future.result()
+
+    def _submit(self, section):
+        future = self._in_flight.get(section.name)
+        if future is None or future.done():
+            future = self._executor.submit(section.load)
+            future.add_done_callback(lambda f: self._remember(section.name, f))
+            self._in_flight[section.name] = future
+        return future
+
+    async def _load(self, section):
+        future = asyncio.wrap_future(self._submit(section))
+        try:
+            # shield keeps the timeout from cancelling the load, so a late
+            # result still reaches _remember
+            return await asyncio.wait_for(asyncio.shield(future), section.timeout), False
+        except asyncio.TimeoutError:
+            logger.warning(f"Overview section '{section.name}' timed out after {section.timeout}s.")
+        except Exception as e:
+            logger.error(f"Overview section '{section.name}' failed: {e}")
+        return self._last_good.get(section.name, section.fallback), True
+
+    async def gather(self):
+        """
+        Returns ({section name: value}, [names of sections served stale]).
+        """
+        results = await asyncio.gather(*(self._load(section) for section in self.sections))
+        payload = {section.name: value for section, (value, _) in zip(self.sections, results)}
+        stale = [section.name for section, (_, is_stale) in zip(self.sections, results) if is_stale]
+        return payload, stale
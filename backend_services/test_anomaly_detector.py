@@ -0,0 +1,58 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend_services.anomaly_detector import (
+    ANOMALY_THRESHOLD_STD,
+    ROLLING_WINDOW_SIZE,
+    KilnAnomalyDetector,
+    RollingAnomalyDetector,
+)
+
+def _batch_flags(values):
+    series = pd.Series(values)
+    rolling = series.rolling(window=ROLLING_WINDOW_SIZE)
+    return ((series - rolling.mean()).abs() > rolling.std() * ANOMALY_THRESHOLD_STD).to_numpy()
+
+def test_rolling_detector_matches_pandas():
+    rng = np.random.default_rng(0)
+    values = rng.normal(1450, 5, 5000)
+    values[::997] -= 100        # injected spikes
+    values[500:700] = 1450      # flat run
+    values[3000] = np.nan       # missing reading
+
+    series = pd.Series(values)
+    rolling = series.rolling(window=ROLLING_WINDOW_SIZE)
+    detector = RollingAnomalyDetector()
+    flags, means, stds = [], [], []
+    for value in values:
+        flags.append(detector.update(value))
+        means.append(detector.mean)
+        stds.append(detector.std)
+
+    assert np.array_equal(np.array(means), rolling.mean().to_numpy(), equal_nan=True)
+    assert np.array_equal(np.array(stds), rolling.std().to_numpy(), equal_nan=True)
+    assert np.array_equal(np.array(flags), _batch_flags(values))
+
+def test_kiln_detector_flags_each_metric():
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({
+        'kiln_temperature': rng.normal(1450, 5, 500),
+        'fuel_consumption': rng.normal(80, 2, 500),
+        'vibration': rng.normal(0.5, 0.05, 500),
+        'pressure': rng.normal(50, 2, 500),
+        'oxygen': rng.normal(2.5, 0.05, 500),
+    })
+    df.loc[300, 'pressure'] += 30
+
+    detector = KilnAnomalyDetector()
+    results = pd.DataFrame(detector.update_batch(df.to_dict('records')))
+
+    for metric in df.columns:
+        assert np.array_equal(results[metric].to_numpy(), _batch_flags(df[metric].to_numpy()))
+    assert results.loc[300, 'pressure']
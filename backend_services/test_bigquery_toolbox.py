@@ -0,0 +1,73 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from unittest import mock
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("google.cloud.bigquery")
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend_services import bigquery_client
+
+QUERY_SECONDS = 0.2
+
+class _SlowJob:
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def to_dataframe(self):
+        with self.lock:
+            _SlowJob.in_flight += 1
+            _SlowJob.peak = max(_SlowJob.peak, _SlowJob.in_flight)
+        time.sleep(QUERY_SECONDS)
+        with self.lock:
+            _SlowJob.in_flight -= 1
+        return pd.DataFrame({"forecast_value": [1.0]})
+
+def _make_toolbox(**kwargs):
+    _SlowJob.peak = 0
+    client = mock.Mock()
+    client.query.side_effect = lambda *args, **kwargs: _SlowJob()
+    with mock.patch.object(bigquery_client, "get_bigquery_client", return_value=client):
+        return bigquery_client.BigQueryToolbox(**kwargs)
+
+@pytest.fixture
+def toolbox():
+    return _make_toolbox()
+
+def test_execute_tool_caches_per_parameters(toolbox):
+    for days in (7, 7, 14):
+        assert not toolbox.execute_tool("forecastKilnTemperature", {"days": days}).empty
+
+    assert toolbox.client.query.call_count == 2
+    stats = toolbox.cache_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+
+def test_execute_tools_async_runs_concurrently(toolbox):
+    calls = [(tool["name"], {"days": 7}) for tool in toolbox.get_tools()]
+
+    start = time.perf_counter()
+    results = asyncio.run(toolbox.execute_tools_async(calls, max_concurrency=len(calls)))
+    elapsed = time.perf_counter() - start
+
+    assert len(results) == len(calls) and all(r is not None for r in results)
+    assert elapsed < QUERY_SECONDS * len(calls)
+
+@pytest.mark.parametrize("max_concurrency, expected_peak", [(2, 2), (10, 3)])
+def test_execute_tools_async_bounds_tools_in_flight(max_concurrency, expected_peak):
+    toolbox = _make_toolbox(max_concurrency=3)
+    # Distinct parameters, so no call is served from another's cache entry
+    calls = [("forecastKilnTemperature", {"days": days}) for days in range(1, 9)]
+
+    results = asyncio.run(toolbox.execute_tools_async(calls, max_concurrency=max_concurrency))
+
+    assert all(r is not None for r in results)
+    # A batch limit above the toolbox's pool is clamped to the pool size
+    assert _SlowJob.peak == expected_peak
@@ -0,0 +1,103 @@
+import os
+import sys
+import threading
+import time
+
+import pandas as pd
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend_services.cache import TTLCache, estimate_size, make_key
+
+def test_lru_eviction_is_bounded_by_bytes():
+    frame = pd.DataFrame({"value": range(1000)})
+    size = estimate_size(frame)
+    cache = TTLCache(max_bytes=size * 2, default_ttl=60)
+
+    for i in range(3):
+        cache.set(make_key("frame", kiln_id=i), frame)
+        if i == 1:
+            # Touch the first key so the second one becomes least recently used
+            assert cache.get(make_key("frame", kiln_id=0)) is frame
+
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["size_bytes"] <= cache.max_bytes
+    assert make_key("frame", kiln_id=0) in cache
+    assert make_key("frame", kiln_id=1) not in cache
+
+def test_per_key_ttl_and_invalidation():
+    cache = TTLCache(default_ttl=60)
+    cache.set("short", 1, ttl=0)
+    cache.set(make_key("trend", start="a"), 2)
+    cache.set(make_key("trend", start="b"), 3)
+
+    assert cache.get("short") is None
+    assert cache.invalidate_prefix("trend") == 2
+    assert cache.get(make_key("trend", start="a")) is None
+    assert cache.stats()["misses"] == 2
+
+def test_get_or_load_is_single_flight_and_serves_stale():
+    cache = TTLCache(default_ttl=0.2, refresh_ahead=0.1)
+    calls = []
+
+    def loader():
+        calls.append(None)
+        time.sleep(0.1)
+        return len(calls)
+
+    threads = [threading.Thread(target=cache.get_or_load, args=("key", loader)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+
+    time.sleep(0.25)
+    # Expired: the stale value comes back at once while one refresh runs
+    assert cache.get_or_load("key", loader) == 1
+    assert cache.get_or_load("key", loader) == 1
+    time.sleep(0.2)
+    assert len(calls) == 2
+    assert cache.get_or_load("key", loader) == 2
+
+def test_failed_cold_load_returns_empty_and_is_not_cached():
+    cache = TTLCache()
+
+    def loader():
+        raise RuntimeError("boom")
+
+    assert cache.get_or_load("key", loader, empty=dict) == {}
+    assert "key" not in cache
+
+def test_staleness_bound_and_refresh_backoff():
+    cache = TTLCache(default_ttl=0.05, refresh_ahead=0, max_stale=0.3, refresh_retry=0.5)
+    calls = []
+
+    def loader():
+        calls.append(None)
+        if len(calls) > 1:
+            raise RuntimeError("boom")
+        return "v1"
+
+    assert cache.get_or_load("key", loader) == "v1"
+    time.sleep(0.1)
+    # The first stale read starts a refresh that fails; reads within the retry
+    # delay keep serving the stale value without starting another one
+    for _ in range(5):
+        assert cache.get_or_load("key", loader) == "v1"
+        time.sleep(0.02)
+    assert len(calls) == 2 and cache.stats()["refresh_errors"] == 1
+
+    # Past max_stale the value is not served; the caller waits on a fresh load
+    time.sleep(0.3)
+    assert cache.get_or_load("key", loader, empty=lambda: "empty") == "empty"
+    assert len(calls) == 3
+
+def test_oversized_value_is_not_counted_as_an_eviction():
+    cache = TTLCache(max_bytes=100)
+    cache.set("big", "x" * 1000)
+
+    assert "big" not in cache
+    assert cache.stats()["evictions"] == 0
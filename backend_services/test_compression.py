@@ -0,0 +1,90 @@
+import asyncio
+import gzip
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend_services.cache import TTLCache
+from backend_services.compression import CompressionMiddleware, negotiate
+from backend_services.http_caching import ConditionalResponder, OrjsonResponse
+
+TRENDS = [{"time": f"{i // 60:02d}:{i % 60:02d}", "temp": 1450.0 + i % 7} for i in range(500)]
+
+@pytest.fixture
+def client():
+    cache = TTLCache(default_ttl=60)
+    conditional = ConditionalResponder(cache, min_compress_bytes=1024)
+    app = FastAPI(default_response_class=OrjsonResponse)
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/trends")
+    def trends():
+        return TRENDS
+
+    @app.get("/small")
+    def small():
+        return {"status": "Normal"}
+
+    @app.get("/cached")
+    def cached(request: Request):
+        return conditional.respond(request, lambda: cache.get_or_load("trends", lambda: TRENDS))
+
+    return TestClient(app), conditional
+
+def test_negotiate():
+    assert negotiate("gzip, deflate") == "gzip"
+    assert negotiate("gzip;q=0, deflate") is None
+    assert negotiate("*;q=0.5") in ("br", "gzip")
+    assert negotiate("") is None
+
+def test_large_json_is_compressed(client):
+    client, _ = client
+    response = client.get("/trends", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.json() == TRENDS
+
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/trends", headers={"Accept-Encoding": "identity"}).headers
+
+def test_cached_payload_is_compressed_once(client):
+    client, conditional = client
+    first = client.get("/cached", headers={"Accept-Encoding": "gzip"})
+    assert first.headers["content-encoding"] == "gzip"
+    assert first.json() == TRENDS
+
+    representation = ("/cached", ())
+    _, body, etag = conditional.rendered.get(representation)
+    cached_etag, compressed = conditional.rendered.get((representation, "gzip"))
+    assert cached_etag == etag and gzip.decompress(compressed) == body
+
+    second = client.get("/cached", headers={"Accept-Encoding": "gzip"})
+    assert second.content == first.content
+    assert conditional.rendered.get((representation, "gzip"))[1] is compressed
+
+def test_event_stream_headers_are_not_held_back():
+    sent = []
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"text/event-stream")]})
+        # The client must see the headers before the first event exists
+        assert [message["type"] for message in sent] == ["http.response.start"]
+        await send({"type": "http.response.body", "body": b": keep-alive\n\n", "more_body": True})
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(CompressionMiddleware(app)(scope, None, send))
+    assert len(sent) == 2
@@ -0,0 +1,110 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("duckdb")
+pytest.importorskip("google.cloud.bigquery")
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend_services import bigquery_client, dashboard_data
+from kiln_storage.local_backend import LocalStorage
+
+NUM_MINUTES = 3 * 1440
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    storage = LocalStorage(str(tmp_path))
+    timestamps = pd.date_range("2023-01-01", periods=NUM_MINUTES, freq="min", tz="UTC")
+    rng = np.random.default_rng(0)
+    source = pd.DataFrame({"timestamp": timestamps})
+    for column in ['kiln_temperature', 'pressure', 'oxygen', 'fuel_consumption', 'actual_fcao']:
+        source[column] = rng.normal(100, 1, NUM_MINUTES)
+    storage.write_table(source, "simulated_kiln_data", partition_field="timestamp")
+    storage.write_table(pd.DataFrame({
+        "id": [1, 2],
+        "message": ["old", "recent"],
+        "timestamp": [timestamps[10], timestamps[-10]],
+        "type": ["Critical", "Warning"],
+    }), "alerts", partition_field="timestamp")
+
+    monkeypatch.setattr(bigquery_client, "get_storage", lambda *args: storage)
+    bigquery_client.dashboard_cache.clear()
+    yield storage
+    bigquery_client.dashboard_cache.clear()
+
+def test_kiln_health_reads_only_the_requested_window(storage):
+    payload = dashboard_data.build_kiln_health("24h", fallback={}, max_points=None)
+
+    assert len(payload["trends"]) == 1440
+    assert [alert["message"] for alert in payload["recent_alerts"]] == ["recent"]
+    assert payload["status"] == "Warning"
+
+def test_empty_dataset_serves_fallback(tmp_path, monkeypatch):
+    monkeypatch.setattr(bigquery_client, "get_storage", lambda *args: LocalStorage(str(tmp_path)))
+    bigquery_client.dashboard_cache.clear()
+    fallback = {"trends": []}
+
+    assert dashboard_data.build_kiln_health("24h", fallback) is fallback
+
+@pytest.mark.parametrize("timerange", ["", "24", "7x", "0h", "500d"])
+def test_parse_timerange_rejects_invalid_ranges(timerange):
+    with pytest.raises(ValueError):
+        dashboard_data.parse_timerange(timerange)
+
+def test_trends_are_downsampled_to_max_points(storage):
+    payload = dashboard_data.build_kiln_health("3d", fallback={}, max_points=200)
+
+    assert len(payload["trends"]) == 200
+
+def test_long_ranges_read_the_coarsest_adequate_rollup(storage):
+    hourly = pd.DataFrame({
+        "timestamp": pd.date_range("2023-01-01", periods=72, freq="h", tz="UTC"),
+        "kiln_temperature_mean": 1.0,
+        "pressure_mean": 2.0,
+        "oxygen_mean": 3.0,
+    })
+    storage.write_table(hourly, "kiln_rollup_1h", partition_field="timestamp")
+
+    assert dashboard_data.pick_resolution(pd.Timedelta(days=3), 50) == "1h"
+    assert dashboard_data.pick_resolution(pd.Timedelta(hours=1), 500) is None
+
+    payload = dashboard_data.build_kiln_health("3d", fallback={}, max_points=50)
+    assert len(payload["trends"]) == 50
+    assert {point["temp"] for point in payload["trends"]} == {1.0}
+
+def test_failed_alerts_load_reports_no_alerts(storage, monkeypatch):
+    class FailingAlerts:
+        def __getattr__(self, name):
+            return getattr(storage, name)
+
+        def query(self, sql, params=None):
+            if "alerts" in sql:
+                raise RuntimeError("alerts table unavailable")
+            return storage.query(sql, params)
+
+    monkeypatch.setattr(bigquery_client, "get_storage", lambda *args: FailingAlerts())
+    payload = dashboard_data.build_kiln_health("24h", fallback={}, max_points=None)
+
+    assert payload["status"] == "Normal"
+    assert payload["recent_alerts"] == []
+
+def test_lagging_rollup_is_completed_from_raw_samples(storage):
+    hourly = pd.DataFrame({
+        "timestamp": pd.date_range("2023-01-01", periods=48, freq="h", tz="UTC"),
+        "kiln_temperature_mean": 1.0,
+    })
+    storage.write_table(hourly, "kiln_rollup_1h", partition_field="timestamp")
+    start, end = dashboard_data.resolve_window("3d")
+
+    df = dashboard_data.load_sensor_trend(['kiln_temperature'], start, end, min_points=50)
+
+    raw = df.iloc[48:]
+    assert (df['kiln_temperature'].iloc[:48] == 1.0).all()
+    assert raw['timestamp'].iloc[0] == pd.Timestamp("2023-01-03", tz="UTC")
+    assert raw['timestamp'].iloc[-1] == end
+    assert len(raw) == 1440
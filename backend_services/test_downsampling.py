@@ -0,0 +1,48 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend_services.downsampling import downsample_frame, lttb_indices
+
+def _reference_lttb(x, y, max_points):
+    # Straightforward per-point LTTB
+    n = len(x)
+    every = (n - 2) / (max_points - 2)
+    selected = [0]
+    a = 0
+    for i in range(max_points - 2):
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        cx, cy = np.mean(x[end:next_end]), np.mean(y[end:next_end])
+        areas = [abs((x[a] - cx) * (y[j] - y[a]) - (x[a] - x[j]) * (cy - y[a])) for j in range(start, end)]
+        a = start + int(np.argmax(areas))
+        selected.append(a)
+    selected.append(n - 1)
+    return np.array(selected)
+
+def test_lttb_matches_reference_implementation():
+    rng = np.random.default_rng(0)
+    x = np.arange(5000, dtype=float)
+    y = np.cumsum(rng.normal(size=5000))
+    expected = _reference_lttb(x / x[-1], (y - y.min()) / np.ptp(y), 300)
+
+    np.testing.assert_array_equal(lttb_indices(x, y, 300), expected)
+
+def test_downsample_frame_keeps_spikes_and_endpoints():
+    values = np.zeros(10_000)
+    values[1234] = 50.0
+    df = pd.DataFrame({
+        "timestamp": pd.date_range("2023-01-01", periods=len(values), freq="min", tz="UTC"),
+        "temp": values,
+    })
+
+    reduced = downsample_frame(df, "timestamp", ["temp"], 100)
+
+    assert len(reduced) == 100
+    assert reduced.index[0] == 0 and reduced.index[-1] == len(df) - 1
+    assert reduced["temp"].max() == 50.0
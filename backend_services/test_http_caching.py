@@ -0,0 +1,72 @@
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend_services.cache import TTLCache
+from backend_services.http_caching import ConditionalResponder
+
+@pytest.fixture
+def app_state():
+    cache = TTLCache(default_ttl=60)
+    source = {"value": 1, "builds": 0}
+    conditional = ConditionalResponder(cache)
+    app = FastAPI()
+
+    @app.get("/kiln_health")
+    def kiln_health(request: Request, timerange: str = "24h"):
+        def build():
+            source["builds"] += 1
+            return {"value": cache.get_or_load(("value", timerange), lambda: source["value"])}
+        return conditional.respond(request, build)
+
+    return TestClient(app), cache, source
+
+def test_unchanged_data_returns_304(app_state):
+    client, _, source = app_state
+    first = client.get("/kiln_health")
+    etag = first.headers["etag"]
+    assert first.json() == {"value": 1}
+    assert "must-revalidate" in first.headers["cache-control"]
+
+    second = client.get("/kiln_health", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.headers["etag"] == etag
+    assert source["builds"] == 1
+
+    # Another representation of the same endpoint has its own ETag
+    other = client.get("/kiln_health?timerange=7d", headers={"If-None-Match": etag})
+    assert other.status_code == 200
+
+def test_changed_data_returns_new_etag(app_state):
+    client, cache, source = app_state
+    etag = client.get("/kiln_health").headers["etag"]
+
+    # Re-storing an identical value keeps the version and the ETag
+    cache.set(("value", "24h"), 1)
+    assert client.get("/kiln_health", headers={"If-None-Match": etag}).status_code == 304
+
+    source["value"] = 2
+    cache.set(("value", "24h"), 2)
+    refreshed = client.get("/kiln_health", headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.json() == {"value": 2}
+    assert refreshed.headers["etag"] != etag
+
+def test_unchanged_data_is_served_without_rebuilding(app_state):
+    client, _, source = app_state
+    first = client.get("/kiln_health")
+    second = client.get("/kiln_health")
+    assert second.status_code == 200
+    assert second.content == first.content
+    assert second.headers["content-type"] == "application/json"
+    assert source["builds"] == 1
@@ -0,0 +1,146 @@
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("google.cloud.bigquery")
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend_services.live_feed import KilnTelemetrySource, LiveEvent, Subscription, TelemetryHub
+
+def test_slow_subscriber_merges_and_drops():
+    async def scenario():
+        subscription = Subscription(maxsize=2)
+        subscription.put(LiveEvent(1, "samples", "samples", [{"v": 1}]))
+        subscription.put(LiveEvent(2, "kpis", "kpis", {"v": 1}))
+        subscription.put(LiveEvent(3, "samples", "samples", [{"v": 2}]))
+        subscription.put(LiveEvent(4, "kpis", "kpis", {"v": 2}))
+        subscription.put(LiveEvent(5, "alert", ("alert", 7), {"id": 7}))
+        events = [await subscription.get(0.01) for _ in range(3)]
+        return subscription, events
+
+    subscription, events = asyncio.run(scenario())
+    # The merged sample batch was the oldest pending key and got dropped
+    assert [event.type for event in events[:2]] == ["kpis", "alert"]
+    assert events[0].data == {"v": 2}
+    assert events[2] is None
+    assert subscription.merged == 2 and subscription.dropped == 1
+
+def test_alerts_are_never_dropped():
+    async def scenario():
+        subscription = Subscription(maxsize=1)
+        subscription.put(LiveEvent(1, "alert", ("alert", 1), {"id": 1}))
+        subscription.put(LiveEvent(2, "alert", ("alert", 2), {"id": 2}))
+        return subscription, await subscription.get(0.01)
+
+    subscription, event = asyncio.run(scenario())
+    # With only alerts left to drop, the client is cut off to resync instead
+    assert subscription.overflowed and event is None
+    assert subscription.dropped == 0
+
+def test_one_poll_feeds_every_subscriber():
+    polls = []
+
+    def poll(cursor):
+        polls.append(cursor)
+        return [("kpis", "kpis", {"tick": len(polls)})], len(polls)
+
+    async def scenario():
+        hub = TelemetryHub(poll, interval=0.05)
+        async with hub.subscribe() as first, hub.subscribe() as second:
+            received = [await first.get(1), await second.get(1)]
+        return hub, received
+
+    hub, received = asyncio.run(scenario())
+    assert received[0] is received[1]
+    assert received[0].message == b'{"id":1,"type":"kpis","data":{"tick":1}}'
+    assert polls == [None] and hub.cursor == 1 and hub._task is None
+
+def test_abandoned_poll_does_not_advance_the_cursor():
+    polls = []
+
+    def poll(cursor):
+        polls.append(cursor)
+        time.sleep(0.1)
+        return [("kpis", "kpis", {})], len(polls)
+
+    async def scenario():
+        hub = TelemetryHub(poll, interval=0.01)
+        async with hub.subscribe():
+            await asyncio.sleep(0.02)
+        # The last client left mid-poll; the next start polls from the same cursor
+        async with hub.subscribe() as subscription:
+            event = await subscription.get(1)
+        return hub, event
+
+    hub, event = asyncio.run(scenario())
+    assert event is not None
+    assert polls == [None, None]
+
+def test_source_returns_only_new_rows(tmp_path, monkeypatch):
+    pytest.importorskip("duckdb")
+    from backend_services import bigquery_client
+    from kiln_storage.local_backend import LocalStorage
+
+    storage = LocalStorage(str(tmp_path))
+    timestamps = pd.date_range("2023-01-01", periods=60, freq="min", tz="UTC")
+    source = pd.DataFrame({"timestamp": timestamps})
+    for column in ['kiln_temperature', 'pressure', 'oxygen', 'fuel_consumption', 'specific_energy_consumption',
+                   'vibration']:
+        source[column] = np.arange(60, dtype=float)
+    storage.write_table(source, "simulated_kiln_data")
+    storage.write_table(pd.DataFrame({
+        "id": [1], "message": ["high temp"], "timestamp": [timestamps[-1]], "type": ["Warning"],
+    }), "alerts")
+    monkeypatch.setattr(bigquery_client, "get_storage", lambda *args: storage)
+    bigquery_client.dashboard_cache.clear()
+
+    telemetry = KilnTelemetrySource(backfill=pd.Timedelta(minutes=5))
+    updates, cursor = telemetry(None)
+    updates = {type: data for type, _, data in updates}
+    assert len(updates["samples"]) == 5
+    assert updates["kpis"]["kiln_temperature"] == 59.0
+    assert updates["kpis"]["anomalies"] == []
+    assert "vibration" not in updates["kpis"]
+    assert updates["alert"]["message"] == "high temp"
+    assert telemetry(cursor) == ([], cursor)
+    bigquery_client.dashboard_cache.clear()
+
+def test_source_flags_anomalies_on_the_stream(tmp_path, monkeypatch):
+    pytest.importorskip("duckdb")
+    from backend_services import bigquery_client
+    from kiln_storage.local_backend import LocalStorage
+
+    storage = LocalStorage(str(tmp_path))
+    rng = np.random.default_rng(0)
+    timestamps = pd.date_range("2023-01-01", periods=130, freq="min", tz="UTC")
+    source = pd.DataFrame({"timestamp": timestamps})
+    for column in ['kiln_temperature', 'pressure', 'oxygen', 'fuel_consumption', 'specific_energy_consumption',
+                   'vibration']:
+        source[column] = rng.normal(100, 1, len(timestamps))
+    source.loc[129, 'pressure'] += 50
+    storage.write_table(source.iloc[:120], "simulated_kiln_data")
+    storage.write_table(pd.DataFrame(columns=["id", "message", "timestamp", "type"]).astype(
+        {"id": int, "timestamp": "datetime64[ns, UTC]"}), "alerts")
+    monkeypatch.setattr(bigquery_client, "get_storage", lambda *args: storage)
+    bigquery_client.dashboard_cache.clear()
+
+    telemetry = KilnTelemetrySource(backfill=pd.Timedelta(minutes=5))
+    updates, cursor = telemetry(None)
+    # The warm-up window primes the detector but only the backfill is sent
+    assert len(updates[0][2]) == 5
+    storage.write_table(source.iloc[120:], "simulated_kiln_data", mode="append")
+
+    first, next_cursor = telemetry(cursor)
+    # Re-polling from the same cursor replays the same detector state
+    assert telemetry(cursor)[0] == first
+    samples = dict((type, data) for type, _, data in first)["samples"]
+    assert [row["anomalies"] for row in samples] == [[]] * 9 + [["pressure"]]
+    assert next_cursor[2] is not cursor[2]
+    bigquery_client.dashboard_cache.clear()
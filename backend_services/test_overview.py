@@ -0,0 +1,73 @@
+import asyncio
+import os
+import sys
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend_services.overview import OverviewAggregator, Section
+
+def _sleep_then(seconds, value):
+    def load():
+        time.sleep(seconds)
+        return value
+    return load
+
+def _fail():
+    raise RuntimeError("query failed")
+
+def test_sections_load_concurrently_and_degrade_independently():
+    aggregator = OverviewAggregator([
+        Section("fast", _sleep_then(0.2, "fast")),
+        Section("also_fast", _sleep_then(0.2, "also_fast")),
+        Section("slow", _sleep_then(0.6, "slow"), timeout=0.3, fallback="slow fallback"),
+        Section("broken", _fail, fallback="broken fallback"),
+    ])
+
+    async def timed_gather():
+        start = time.perf_counter()
+        result = await aggregator.gather()
+        return result, time.perf_counter() - start
+
+    (payload, stale), elapsed = asyncio.run(timed_gather())
+
+    assert payload == {
+        "fast": "fast",
+        "also_fast": "also_fast",
+        "slow": "slow fallback",
+        "broken": "broken fallback",
+    }
+    assert stale == ["slow", "broken"]
+    assert elapsed < 0.5
+
+def test_timed_out_section_serves_its_last_good_value():
+    aggregator = OverviewAggregator([Section("slow", _sleep_then(0.3, "fresh"), timeout=0.1, fallback="fallback")])
+
+    async def poll_twice():
+        first, _ = await aggregator.gather()
+        # Let the first, timed-out load finish in the background
+        await asyncio.sleep(0.3)
+        second, _ = await aggregator.gather()
+        return first, second
+
+    first, second = asyncio.run(poll_twice())
+    assert first["slow"] == "fallback"
+    assert second["slow"] == "fresh"
+
+def test_hung_section_is_not_resubmitted_while_in_flight():
+    calls = []
+
+    def hung():
+        calls.append(1)
+        time.sleep(0.4)
+        return "late"
+
+    aggregator = OverviewAggregator([Section("hung", hung, timeout=0.05, fallback="fallback")])
+
+    async def poll(times):
+        return [await aggregator.gather() for _ in range(times)]
+
+    results = asyncio.run(poll(3))
+    assert [payload["hung"] for payload, _ in results] == ["fallback"] * 3
+    assert len(calls) == 1
@@ -0,0 +1,52 @@
+import os
+import sys
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend_services.versioned_state import VersionedState, apply_patch, json_diff
+
+TRENDS = [{"time": f"{i:02d}:00", "temp": 1450.0 + i} for i in range(24)]
+
+def overview(temp=1450.2, status="pending"):
+    return {
+        "kiln_health": {"operational_parameters": {"kiln_temp": {"value": temp, "unit": "°C"}}, "trends": TRENDS},
+        "recommendations": [{"id": 1, "status": status}, {"id": 2, "status": "pending"}],
+    }
+
+def test_diff_round_trips():
+    old, new = overview(), overview(temp=1451.0, status="approved")
+    new["energy/cost"] = {"value": 1}
+    del new["kiln_health"]["trends"]
+
+    ops = json_diff(old, new)
+    assert apply_patch(old, ops) == new
+    assert {"op": "replace", "path": "/recommendations/0/status", "value": "approved"} in ops
+    assert {"op": "add", "path": "/energy~1cost", "value": {"value": 1}} in ops
+
+def test_client_gets_only_changed_paths():
+    state = VersionedState()
+    first = state.update(overview())
+    assert state.update(overview()) == first
+
+    state.update(overview(temp=1451.0))
+    state.update(overview(temp=1451.0, status="approved"))
+    changes = state.changes_since(first)
+    assert changes["version"] == state.version
+    assert [op["path"] for op in changes["patch"]] == [
+        "/kiln_health/operational_parameters/kiln_temp/value",
+        "/recommendations/0/status",
+    ]
+    assert apply_patch(overview(), changes["patch"]) == state.document
+    assert state.changes_since(state.version) == {"version": state.version, "patch": []}
+
+def test_version_gap_returns_snapshot():
+    state = VersionedState(max_history=1)
+    first = state.update(overview())
+    state.update(overview(temp=1451.0))
+    state.update(overview(temp=1452.0))
+
+    assert "snapshot" in state.changes_since(first)
+    assert "snapshot" in state.changes_since("0-1")
+    assert "snapshot" in state.changes_since(None)
+    assert state.changes_since(state.version)["patch"] == []
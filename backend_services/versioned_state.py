@@ -0,0 +1,134 @@
+from collections import deque
+import copy
+import uuid
+
+import orjson
+
+from backend_services.http_caching import dumps
+
+# --- Configuration --- #
+MAX_PATCH_HISTORY = 64  # Versions a client can lag behind and still get a patch
+
+def _pointer(path, key):
+    # RFC 6901 escaping for one reference token
+    return f"{path}/{str(key).replace('~', '~0').replace('/', '~1')}"
+
+def json_diff(old, new, path=""):
+    """
+    JSON-patch (RFC 6902) operations that turn `old` into `new`.
+
+    Dicts are compared key by key. Lists of equal length are compared item by
+    item unless most items changed; any other change replaces the value at
+    that path wholesale, which keeps patches for shifted trend arrays no
+    larger than the arrays themselves.
+    """
+    if type(old) is not type(new):
+        return [{"op": "replace", "path": path, "value": new}]
+    if isinstance(new, dict):
+        ops = []
+        for key, value in new.items():
+            if key not in old:
+                ops.append({"op": "add", "path": _pointer(path, key), "value": value})
+            else:
+                ops.extend(json_diff(old[key], value, _pointer(path, key)))
+        ops.extend({"op": "remove", "path": _pointer(path, key)} for key in old if key not in new)
+        return ops
+    if isinstance(new, list):
+        if len(old) != len(new):
+            return [{"op": "replace", "path": path, "value": new}]
+        ops = []
+        changed = 0
+        for index, (a, b) in enumerate(zip(old, new)):
+            if a != b:
+                changed += 1
+                ops.extend(json_diff(a, b, _pointer(path, index)))
+        if changed * 2 > len(new):
+            return [{"op": "replace", "path": path, "value": new}]
+        return ops
+    if old != new:
+        return [{"op": "replace", "path": path, "value": new}]
+    return []
+
+def apply_patch(document, ops):
+    """
+    Applies the add / remove / replace operations produced by `json_diff` to
+    a copy of `document` and returns it.
+    """
+    document = copy.deepcopy(document)
+    for op in ops:
+        tokens = [t.replace('~1', '/').replace('~0', '~') for t in op["path"].split("/")[1:]]
+        if not tokens:
+            document = copy.deepcopy(op["value"])
+            continue
+        parent = document
+        for token in tokens[:-1]:
+            parent = parent[int(token) if isinstance(parent, list) else token]
+        last = int(tokens[-1]) if isinstance(parent, list) else tokens[-1]
+        if op["op"] == "remove":
+            del parent[last]
+        else:
+            parent[last] = copy.deepcopy(op["value"])
+    return document
+
+class VersionedState:
+    """
+    A JSON document whose changes are numbered so clients can catch up with
+    a patch instead of a full copy.
+
+    `update` records the diff from the previous document as a new version
+    (an unchanged document keeps its version). `changes_since` returns the
+    patches a client at an older version needs, or the full snapshot when
+    that version is unknown, from a previous process, or older than the
+    retained history, or when the patches would outweigh the snapshot.
+
+    Versions are opaque strings "<epoch>-<n>", so a restart is a version gap.
+    """
+
+    def __init__(self, max_history=MAX_PATCH_HISTORY):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.number = 0
+        self.document = None
+        self._snapshot_size = 0
+        self._history = deque(maxlen=max_history)  # (number, ops)
+
+    @property
+    def version(self):
+        return f"{self.epoch}-{self.number}"
+
+    def update(self, document):
+        """
+        Makes `document` the current state and returns the current version.
+        """
+        # A JSON round trip is a cheaper deep copy than copy.deepcopy, and
+        # normalizes tuples and numpy values so they diff like the client sees them
+        body = dumps(document)
+        document = orjson.loads(body)
+        if self.document is not None:
+            ops = json_diff(self.document, document)
+            if not ops:
+                return self.version
+            self._history.append((self.number + 1, ops))
+        self.number += 1
+        self.document = document
+        self._snapshot_size = len(body)
+        return self.version
+
+    def _parse(self, version):
+        epoch, _, number = (version or "").partition("-")
+        if epoch != self.epoch or not number.isdigit():
+            return None
+        return int(number)
+
+    def changes_since(self, version):
+        """
+        Returns {"version", "patch": [ops]} to bring a client at `version` up
+        to date, or {"version", "snapshot": document} on a version gap.
+        """
+        number = self._parse(version)
+        if number is not None and number <= self.number:
+            pending = [ops for n, ops in self._history if n > number]
+            if len(pending) == self.number - number:
+                patch = [op for ops in pending for op in ops]
+                if len(dumps(patch)) < self._snapshot_size:
+                    return {"version": self.version, "patch": patch}
+        return {"version": self.version, "snapshot": self.document}
@@ -0,0 +1,51 @@
+import argparse
+import os
+import time
+from simulate_kiln_data import generate_kiln_data, generate_kiln_data_vectorized
+from simulate_fleet import simulate_fleet
+
+# --- Configuration --- #
+BENCHMARK_DAYS = [7, 90, 365]
+
+def time_call(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+def run_benchmark(days_list=BENCHMARK_DAYS, skip_loop=False):
+    """
+    Compares the per-minute loop in generate_kiln_data against the vectorized engine.
+    """
+    print(f"{'days':>6} {'rows':>10} {'loop (s)':>10} {'vectorized (s)':>15} {'speedup':>9}")
+    for num_days in days_list:
+        vec_time, (df, alerts_df) = time_call(generate_kiln_data_vectorized, num_days=num_days, seed=42)
+        if skip_loop:
+            loop_time = float('nan')
+        else:
+            loop_time, (loop_df, loop_alerts_df) = time_call(generate_kiln_data, num_days=num_days)
+            assert list(loop_df.columns) == list(df.columns)
+            assert loop_alerts_df.drop(columns='timestamp').equals(alerts_df.drop(columns='timestamp'))
+        print(f"{num_days:>6} {len(df):>10} {loop_time:>10.2f} {vec_time:>15.3f} {loop_time / vec_time:>8.1f}x")
+
+def run_fleet_benchmark(num_kilns, num_days=30, max_workers_list=None):
+    """
+    Times simulate_fleet at increasing worker counts to show core scaling.
+    """
+    max_workers_list = max_workers_list or sorted({1, 2, 4, os.cpu_count() or 1})
+    print(f"{'workers':>8} {'kilns':>6} {'time (s)':>10} {'rows/s':>12} {'scaling':>8}")
+    baseline = None
+    for max_workers in max_workers_list:
+        elapsed, (df, _) = time_call(simulate_fleet, num_kilns, num_days=num_days, max_workers=max_workers)
+        baseline = baseline or elapsed
+        print(f"{max_workers:>8} {num_kilns:>6} {elapsed:>10.2f} {len(df) / elapsed:>12.0f} {baseline / elapsed:>7.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the kiln data simulators.")
+    parser.add_argument("--days", type=int, nargs="+", default=BENCHMARK_DAYS)
+    parser.add_argument("--skip-loop", action="store_true", help="Only time the vectorized engine.")
+    parser.add_argument("--fleet", type=int, metavar="NUM_KILNS", help="Benchmark fleet mode instead.")
+    args = parser.parse_args()
+    if args.fleet:
+        run_fleet_benchmark(args.fleet)
+    else:
+        run_benchmark(args.days, args.skip_loop)
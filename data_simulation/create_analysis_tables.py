@@ -1,5 +1,12 @@
 from google.cloud import bigquery
 import os
+import sys
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from kiln_storage import get_storage
+from kiln_storage.rollups import ROLLUP_RESOLUTIONS, ROLLUP_SENSORS, ROLLUP_STATS, rollup_table_id
 
 # --- Configuration --- #
 PROJECT_ID = os.getenv("GCP_PROJECT_ID", "operations-472416")
@@ -8,6 +15,7 @@ MODEL_PREDICTIONS_TABLE_ID = "model_predictions"
 VARIANCE_ANALYSIS_TABLE_ID = "variance_analysis"
 WEEKLY_PERFORMANCE_TABLE_ID = "weekly_performance"
 CORRELATION_DATA_TABLE_ID = "correlation_data"
+PARTITION_FIELD = "timestamp"
 
 # --- Schemas --- #
 model_predictions_schema = [
@@ -37,35 +45,40 @@ correlation_data_schema = [
     bigquery.SchemaField("fcao", "FLOAT", mode="REQUIRED"),
 ]
 
-def create_table(client, dataset_ref, table_id, schema):
-    table_ref = dataset_ref.table(table_id)
-    try:
-        client.get_table(table_ref)
-        print(f"Table {table_id} already exists.")
-    except Exception:
-        table = bigquery.Table(table_ref, schema=schema)
-        client.create_table(table)
+# One row per bucket, labelled by the bucket start
+rollup_schema = [bigquery.SchemaField("timestamp", "TIMESTAMP", mode="REQUIRED")] + [
+    bigquery.SchemaField(f"{sensor}_{stat}", "INTEGER" if stat == "count" else "FLOAT",
+                         mode="REQUIRED" if stat == "count" else "NULLABLE")
+    for sensor in ROLLUP_SENSORS
+    for stat in ROLLUP_STATS
+]
+
+def create_table(storage, table_id, schema, partition_field=None):
+    # Tables from before day partitioning was introduced are recreated once;
+    # the populate steps and pipeline rebuild their contents
+    if partition_field is not None:
+        storage.drop_if_partitioned_differently(table_id, partition_field)
+    if storage.create_table(table_id, schema, partition_field=partition_field):
         print(f"Table {table_id} created.")
+    else:
+        print(f"Table {table_id} already exists.")
 
 def create_analysis_tables():
     """
     Creates the tables needed for storing analysis and prediction data.
     """
-    client = bigquery.Client(project=PROJECT_ID)
-    dataset_ref = client.dataset(DATASET_ID)
+    storage = get_storage(PROJECT_ID, DATASET_ID)
 
     # Create dataset if it doesn't exist
-    try:
-        client.get_dataset(dataset_ref)
-    except Exception:
-        client.create_dataset(dataset_ref)
-        print(f"Dataset {DATASET_ID} created.")
+    storage.ensure_dataset()
 
     # Create the tables
-    create_table(client, dataset_ref, MODEL_PREDICTIONS_TABLE_ID, model_predictions_schema)
-    create_table(client, dataset_ref, VARIANCE_ANALYSIS_TABLE_ID, variance_analysis_schema)
-    create_table(client, dataset_ref, WEEKLY_PERFORMANCE_TABLE_ID, weekly_performance_schema)
-    create_table(client, dataset_ref, CORRELATION_DATA_TABLE_ID, correlation_data_schema)
+    create_table(storage, MODEL_PREDICTIONS_TABLE_ID, model_predictions_schema, PARTITION_FIELD)
+    create_table(storage, VARIANCE_ANALYSIS_TABLE_ID, variance_analysis_schema, PARTITION_FIELD)
+    create_table(storage, WEEKLY_PERFORMANCE_TABLE_ID, weekly_performance_schema)
+    create_table(storage, CORRELATION_DATA_TABLE_ID, correlation_data_schema)
+    for resolution in ROLLUP_RESOLUTIONS:
+        create_table(storage, rollup_table_id(resolution), rollup_schema, PARTITION_FIELD)
 
 if __name__ == "__main__":
     create_analysis_tables()
\ No newline at end of file
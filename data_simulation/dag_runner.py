@@ -0,0 +1,130 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+import time
+
+@dataclass
+class Step:
+    name: str
+    fn: Callable[[], object]
+    deps: tuple = ()
+    start: Optional[float] = None
+    end: Optional[float] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def duration(self):
+        return self.end - self.start if self.end is not None else None
+
+@dataclass
+class DagRunner:
+    """
+    Runs steps as soon as their dependencies have finished.
+
+    Steps run on a thread pool, which suits the BigQuery jobs they wrap since
+    each spends its time blocked on job.result(). End-to-end time is therefore
+    bounded by the longest dependency chain rather than the sum of all steps.
+    If a step fails, steps that depend on it are skipped, steps already running
+    are allowed to finish, and the first error is re-raised.
+    """
+    max_workers: Optional[int] = None
+    steps: dict = field(default_factory=dict)
+    _t0: float = field(default=0.0, init=False, repr=False)
+
+    def add(self, name, fn, deps=()):
+        if name in self.steps:
+            raise ValueError(f"Step '{name}' is already defined.")
+        self.steps[name] = Step(name, fn, tuple(deps))
+        return self
+
+    def _validate(self):
+        for step in self.steps.values():
+            missing = [dep for dep in step.deps if dep not in self.steps]
+            if missing:
+                raise ValueError(f"Step '{step.name}' depends on unknown steps: {missing}")
+        # Kahn's algorithm: every step must be reachable without a cycle
+        remaining = {name: set(step.deps) for name, step in self.steps.items()}
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Dependency cycle among steps: {sorted(remaining)}")
+            for name in ready:
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+
+    def _run_step(self, step):
+        step.start = time.perf_counter()
+        try:
+            step.fn()
+        finally:
+            step.end = time.perf_counter()
+
+    def run(self):
+        self._t0 = time.perf_counter()
+        self._validate()
+        done, failed, skipped = set(), set(), set()
+        pending = dict(self.steps)
+        running = {}
+        first_error = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                for name, step in list(pending.items()):
+                    if any(dep in failed or dep in skipped for dep in step.deps):
+                        skipped.add(name)
+                        del pending[name]
+                        print(f"[dag] Skipping '{name}' (upstream failure).")
+                    elif all(dep in done for dep in step.deps):
+                        print(f"[dag] Starting '{name}'.")
+                        running[executor.submit(self._run_step, step)] = step
+                        del pending[name]
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    step = running.pop(future)
+                    step.error = future.exception()
+                    if step.error is None:
+                        done.add(step.name)
+                        print(f"[dag] Finished '{step.name}' in {step.duration:.2f}s.")
+                    else:
+                        failed.add(step.name)
+                        first_error = first_error or step.error
+                        print(f"[dag] Step '{step.name}' failed: {step.error}")
+
+        if first_error is not None:
+            raise first_error
+        return self
+
+    def critical_path(self):
+        """
+        Returns the chain of steps that determined the end-to-end time.
+
+        Walks back from the last step to finish, at each hop following the
+        dependency that finished last, i.e. the one the step was waiting on.
+        """
+        finished = [step for step in self.steps.values() if step.end is not None]
+        if not finished:
+            return []
+        step = max(finished, key=lambda s: s.end)
+        path = [step]
+        while step.deps:
+            step = max((self.steps[dep] for dep in step.deps), key=lambda s: s.end)
+            path.append(step)
+        return list(reversed(path))
+
+    def report(self):
+        print(f"{'step':<32} {'start (s)':>10} {'duration (s)':>13}")
+        for step in sorted(self.steps.values(), key=lambda s: (s.start is None, s.start or 0)):
+            if step.start is None:
+                print(f"{step.name:<32} {'-':>10} {'skipped':>13}")
+            else:
+                print(f"{step.name:<32} {step.start - self._t0:>10.2f} {step.duration:>13.2f}")
+        path = self.critical_path()
+        if path:
+            total = path[-1].end - self._t0
+            serial = sum(step.duration for step in self.steps.values() if step.duration is not None)
+            print(f"Critical path: {' -> '.join(step.name for step in path)}")
+            print(f"End-to-end {total:.2f}s vs {serial:.2f}s if run one after another.")
@@ -1,12 +1,23 @@
 from google.cloud import bigquery
 import os
-from simulate_kiln_data import generate_kiln_data
+import sys
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from kiln_storage import APPEND, OVERWRITE, get_storage
+from simulate_kiln_data import MINUTES_PER_DAY, generate_kiln_data_vectorized, iter_kiln_data_chunks
+from simulate_fleet import iter_fleet
 
 # --- Configuration --- #
 DATASET_ID = "kiln_data_dataset"
 TABLE_ID = "simulated_kiln_data"
 ALERTS_TABLE_ID = "alerts"
+FLEET_TABLE_ID = "simulated_fleet_data"
+FLEET_ALERTS_TABLE_ID = "fleet_alerts"
 PROJECT_ID = os.getenv("GCP_PROJECT_ID", "operations-472416")
+# Every table loaded here is day-partitioned on this column for time-range reads
+PARTITION_FIELD = "timestamp"
 
 # --- BigQuery Schema Definition --- #
 schema = [
@@ -34,46 +45,81 @@ alerts_schema = [
     bigquery.SchemaField("type", "STRING", mode="REQUIRED"),
 ]
 
-def load_simulated_data_to_bigquery():
+# Fleet mode tables carry a leading kiln_id column
+fleet_schema = [bigquery.SchemaField("kiln_id", "STRING", mode="REQUIRED")] + schema
+fleet_alerts_schema = [bigquery.SchemaField("kiln_id", "STRING", mode="REQUIRED")] + alerts_schema
+
+def load_simulated_data_to_bigquery(num_days=7, chunk_days=None):
     """
     Generates simulated kiln data and loads it into a BigQuery table.
+
+    When `chunk_days` is set, the simulator is consumed as a stream of
+    `chunk_days`-sized chunks and each chunk is appended as it arrives, so peak
+    memory stays flat regardless of `num_days`.
     """
-    client = bigquery.Client(project=PROJECT_ID)
-    table_id = f"{PROJECT_ID}.{DATASET_ID}.{TABLE_ID}"
-    alerts_table_id = f"{PROJECT_ID}.{DATASET_ID}.{ALERTS_TABLE_ID}"
+    storage = get_storage(PROJECT_ID, DATASET_ID)
+
+    if chunk_days:
+        load_chunks_to_bigquery(
+            storage,
+            iter_kiln_data_chunks(num_days=num_days, chunk_minutes=chunk_days * MINUTES_PER_DAY),
+            TABLE_ID,
+            ALERTS_TABLE_ID,
+        )
+        return
 
     # Generate data
     print("Generating simulated kiln data...")
-    df, alerts_df = generate_kiln_data(num_days=7)
+    df, alerts_df = generate_kiln_data_vectorized(num_days=num_days)
     print(f"Generated {len(df)} rows of data and {len(alerts_df)} alerts.")
 
-    # Configure the BigQuery job for simulated_kiln_data
-    job_config = bigquery.LoadJobConfig(
-        schema=schema,
-        write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE, # Overwrite table
-    )
+    # Load the DataFrames, overwriting the tables
+    load_dataframe(storage, df, TABLE_ID, schema, OVERWRITE)
+    load_dataframe(storage, alerts_df, ALERTS_TABLE_ID, alerts_schema, OVERWRITE)
 
-    # Load the DataFrame into BigQuery
-    job = client.load_table_from_dataframe(
-        df, table_id, job_config=job_config
+def load_dataframe(storage, df, table_name, table_schema, mode):
+    """
+    Writes `df` to `table_name` and waits for the write to complete.
+    """
+    output_rows = storage.write_table(
+        df, table_name, mode=mode, schema=table_schema, partition_field=PARTITION_FIELD
     )
-    job.result()  # Wait for the job to complete
+    print(f"Loaded {output_rows} rows into {table_name}.")
 
-    print(f"Loaded {job.output_rows} rows into {table_id}.")
+def load_chunks_to_bigquery(storage, chunks, table_name, alerts_table_name, data_schema=schema, alerts_table_schema=alerts_schema):
+    """
+    Loads (df, alerts_df) chunks as they are produced.
 
-    # Configure the BigQuery job for alerts
-    job_config = bigquery.LoadJobConfig(
-        schema=alerts_schema,
-        write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE, # Overwrite table
-    )
+    The first chunk overwrites both tables and later chunks are appended. Empty
+    alert chunks are skipped.
+    """
+    data_mode = OVERWRITE
+    alerts_mode = OVERWRITE
+    total_rows = 0
+    for df, alerts_df in chunks:
+        load_dataframe(storage, df, table_name, data_schema, data_mode)
+        data_mode = APPEND
+        total_rows += len(df)
 
-    # Load the DataFrame into BigQuery
-    job = client.load_table_from_dataframe(
-        alerts_df, alerts_table_id, job_config=job_config
-    )
-    job.result()  # Wait for the job to complete
+        if len(alerts_df):
+            load_dataframe(storage, alerts_df, alerts_table_name, alerts_table_schema, alerts_mode)
+            alerts_mode = APPEND
 
-    print(f"Loaded {job.output_rows} rows into {alerts_table_id}.")
+    print(f"Streamed {total_rows} rows into {table_name}.")
+
+def load_fleet_data_to_bigquery(num_kilns, num_days=7, max_workers=None):
+    """
+    Simulates a fleet of kilns on a process pool and loads each kiln into the
+    fleet tables as soon as its simulation finishes.
+    """
+    load_chunks_to_bigquery(
+        get_storage(PROJECT_ID, DATASET_ID),
+        iter_fleet(num_kilns, num_days=num_days, max_workers=max_workers),
+        FLEET_TABLE_ID,
+        FLEET_ALERTS_TABLE_ID,
+        data_schema=fleet_schema,
+        alerts_table_schema=fleet_alerts_schema,
+    )
 
 if __name__ == "__main__":
     load_simulated_data_to_bigquery()
\ No newline at end of file
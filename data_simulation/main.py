@@ -1,33 +1,61 @@
 import os
-from simulate_kiln_data import generate_kiln_data
+from dag_runner import DagRunner
 from load_data_to_bigquery import load_simulated_data_to_bigquery
 from create_analysis_tables import create_analysis_tables
-from populate_analysis_tables import populate_variance_analysis, populate_model_predictions, populate_weekly_performance, populate_correlation_data
+from populate_analysis_tables import (
+    IN_PROCESS_SOURCE_COLUMNS,
+    populate_correlation_data,
+    populate_model_predictions,
+    populate_variance_analysis,
+    populate_weekly_performance,
+    read_source,
+)
 
 # --- Configuration --- #
 # IMPORTANT: Replace with your actual GCP Project ID
 PROJECT_ID = "operations-472416"
 
+def build_refresh_dag():
+    """
+    Declares the refresh steps and what each one needs to have finished first.
+
+    Creating the analysis tables overlaps with the simulated data upload, the
+    static weekly_performance table only waits for the tables to exist, and
+    the source-derived tables populate in parallel once the upload lands.
+    Variance analysis runs inside the storage engine; the other derived
+    tables share a single read of the few source columns they need, so the
+    refresh downloads the source once.
+    """
+    source = {}
+
+    def read_shared_source():
+        source["df"] = read_source(IN_PROCESS_SOURCE_COLUMNS)
+
+    return (
+        DagRunner()
+        .add("load_simulated_data", load_simulated_data_to_bigquery)
+        .add("create_analysis_tables", create_analysis_tables)
+        .add("populate_weekly_performance", populate_weekly_performance, deps=["create_analysis_tables"])
+        .add("populate_variance_analysis", lambda: populate_variance_analysis(pushdown=True),
+             deps=["load_simulated_data", "create_analysis_tables"])
+        .add("read_source", read_shared_source, deps=["load_simulated_data"])
+        .add("populate_model_predictions", lambda: populate_model_predictions(source["df"]),
+             deps=["read_source", "create_analysis_tables"])
+        .add("populate_correlation_data", lambda: populate_correlation_data(source["df"]),
+             deps=["read_source", "create_analysis_tables"])
+    )
+
 def main():
     """Orchestrates the data simulation and loading process."""
     print("--- Starting Data Simulation and Loading Process ---")
 
-    # 1. Generate and Load Simulated Data
-    print("Generating and loading simulated kiln data...")
-    load_simulated_data_to_bigquery()
-
-    # 2. Create Analysis Tables
-    print("Creating analysis tables...")
-    create_analysis_tables()
-
-    # 3. Populate Analysis Tables
-    print("Populating analysis tables...")
-    populate_variance_analysis()
-    populate_model_predictions()
-    populate_weekly_performance()
-    populate_correlation_data()
+    dag = build_refresh_dag()
+    try:
+        dag.run()
+    finally:
+        dag.report()
 
     print("--- Data Simulation and Loading Process Complete ---")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
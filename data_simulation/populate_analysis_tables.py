@@ -1,8 +1,14 @@
-from google.cloud import bigquery
+from concurrent.futures import ThreadPoolExecutor
 import os
+import sys
 import pandas as pd
 import numpy as np
 
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from kiln_storage import OVERWRITE, get_storage
+
 # --- Configuration --- #
 PROJECT_ID = os.getenv("GCP_PROJECT_ID", "operations-472416")
 DATASET_ID = "kiln_data_dataset"
@@ -11,149 +17,227 @@ VARIANCE_ANALYSIS_TABLE_ID = "variance_analysis"
 MODEL_PREDICTIONS_TABLE_ID = "model_predictions"
 WEEKLY_PERFORMANCE_TABLE_ID = "weekly_performance"
 CORRELATION_DATA_TABLE_ID = "correlation_data"
-
-def populate_variance_analysis():
+PARTITION_FIELD = "timestamp"
+# Tables the dashboards read by time range
+PARTITIONED_TABLES = {VARIANCE_ANALYSIS_TABLE_ID, MODEL_PREDICTIONS_TABLE_ID}
+
+METRICS_TO_UNPIVOT = [
+    'actual_fcao', 'raw_material_feed_rate', 'kiln_temperature', 
+    'fuel_consumption', 'vibration', 'motor_current_draw', 
+    'pressure', 'oxygen', 'clinker_production', 'energy_consumption_kwh', 
+    'specific_energy_consumption'
+]
+
+# Every source column any derived table needs, so one scan can feed them all
+SHARED_SOURCE_COLUMNS = ['timestamp', 'is_anomaly'] + METRICS_TO_UNPIVOT + [
+    'target_kiln_temperature', 'target_fuel_consumption'
+]
+
+# Source columns of the tables derived in this process when variance analysis
+# is pushed down to the storage engine
+IN_PROCESS_SOURCE_COLUMNS = ['timestamp', 'kiln_temperature', 'actual_fcao']
+
+def _read_source(storage, columns):
+    return storage.read_table(SOURCE_TABLE_ID, columns)
+
+def read_source(columns=SHARED_SOURCE_COLUMNS):
     """
-    Populates the variance_analysis table with data from the simulated_kiln_data table.
+    Reads `columns` of the source table once, for populate steps that share it.
+    """
+    df = _read_source(get_storage(PROJECT_ID, DATASET_ID), columns)
+    print(f"Read {len(df)} source rows.")
+    return df
+
+def _load_table(storage, df, table_name):
+    partition_field = PARTITION_FIELD if table_name in PARTITIONED_TABLES else None
+    output_rows = storage.write_table(df, table_name, mode=OVERWRITE, partition_field=partition_field)
+    print(f"Loaded {output_rows} rows into {table_name}.")
+
+# Per-metric variance targets: a source column name or a constant
+VARIANCE_TARGETS = {
+    'kiln_temperature': 'target_kiln_temperature',
+    'fuel_consumption': 'target_fuel_consumption',
+    'actual_fcao': 2.0,  # Example target
+}
+# Absolute deviation above which a metric is flagged as anomalous
+VARIANCE_THRESHOLDS = {
+    'kiln_temperature': 50,
+    'fuel_consumption': 10,
+    'actual_fcao': 0.2,
+}
+
+# --- Derivations --- #
+def build_variance_analysis(df):
+    """
+    Unpivots the source frame into one row per metric per timestamp, with
+    targets, deviations and threshold-based anomaly flags.
     """
-    client = bigquery.Client(project=PROJECT_ID)
-    
-    # Read data from the source table
-    query = f"""
-        SELECT *
-        FROM `{PROJECT_ID}.{DATASET_ID}.{SOURCE_TABLE_ID}`
-    """
-    df = client.query(query).to_dataframe()
-
-    # Unpivot the DataFrame to have one row per metric per timestamp
-    metrics_to_unpivot = [
-        'actual_fcao', 'raw_material_feed_rate', 'kiln_temperature', 
-        'fuel_consumption', 'vibration', 'motor_current_draw', 
-        'pressure', 'oxygen', 'clinker_production', 'energy_consumption_kwh', 
-        'specific_energy_consumption'
-    ]
-    
-    df_unpivoted = df.melt(id_vars=['timestamp', 'is_anomaly'], value_vars=metrics_to_unpivot, 
+    df_unpivoted = df.melt(id_vars=['timestamp', 'is_anomaly'], value_vars=METRICS_TO_UNPIVOT, 
                              var_name='metric_name', value_name='value')
 
-    # Add target and deviation columns
-    df_unpivoted['target'] = None
-    df_unpivoted['deviation'] = None
+    # melt is metric-major, so each metric's rows are in source row order and
+    # can take the source target column positionally
+    target = np.full(len(df_unpivoted), np.nan)
+    for metric, metric_target in VARIANCE_TARGETS.items():
+        mask = (df_unpivoted['metric_name'] == metric).to_numpy()
+        target[mask] = df[metric_target].to_numpy() if isinstance(metric_target, str) else metric_target
+    df_unpivoted['target'] = target
 
-    # Calculate deviation for kiln_temperature
-    df_unpivoted.loc[df_unpivoted['metric_name'] == 'kiln_temperature', 'target'] = df['target_kiln_temperature']
-    df_unpivoted.loc[df_unpivoted['metric_name'] == 'kiln_temperature', 'deviation'] = \
-        df_unpivoted['value'] - df_unpivoted['target']
+    # Metrics without a target have zero deviation
+    df_unpivoted['deviation'] = (df_unpivoted['value'] - df_unpivoted['target']).fillna(0)
 
-    # Calculate deviation for fuel_consumption
-    df_unpivoted.loc[df_unpivoted['metric_name'] == 'fuel_consumption', 'target'] = df['target_fuel_consumption']
-    df_unpivoted.loc[df_unpivoted['metric_name'] == 'fuel_consumption', 'deviation'] = \
-        df_unpivoted['value'] - df_unpivoted['target']
+    # Set anomaly flag based on deviation
+    for metric, threshold in VARIANCE_THRESHOLDS.items():
+        df_unpivoted.loc[(df_unpivoted['metric_name'] == metric) & (df_unpivoted['deviation'].abs() > threshold), 'is_anomaly'] = True
 
-    # Calculate deviation for actual_fcao
-    df_unpivoted.loc[df_unpivoted['metric_name'] == 'actual_fcao', 'target'] = 2.0  # Example target
-    df_unpivoted.loc[df_unpivoted['metric_name'] == 'actual_fcao', 'deviation'] = \
-        df_unpivoted['value'] - df_unpivoted['target']
+    return df_unpivoted
 
-    # Fill remaining NaN deviations with 0
-    df_unpivoted['deviation'] = df_unpivoted['deviation'].fillna(0)
+def build_variance_analysis_select_sql(source_table):
+    """
+    Returns a SELECT statement equivalent to build_variance_analysis.
 
-    # Set anomaly flag based on deviation
-    df_unpivoted.loc[(df_unpivoted['metric_name'] == 'kiln_temperature') & (df_unpivoted['deviation'].abs() > 50), 'is_anomaly'] = True
-    df_unpivoted.loc[(df_unpivoted['metric_name'] == 'fuel_consumption') & (df_unpivoted['deviation'].abs() > 10), 'is_anomaly'] = True
-    df_unpivoted.loc[(df_unpivoted['metric_name'] == 'actual_fcao') & (df_unpivoted['deviation'].abs() > 0.2), 'is_anomaly'] = True
-
-    # Load the data into the variance_analysis table
-    table_id = f"{PROJECT_ID}.{DATASET_ID}.{VARIANCE_ANALYSIS_TABLE_ID}"
-    job_config = bigquery.LoadJobConfig(
-        write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
+    The unpivot uses the standard `UNPIVOT (value FOR metric_name IN (...))`
+    clause and targets/thresholds become CASE expressions, so the statement runs
+    entirely inside the warehouse. The table name is inserted verbatim and must
+    already be quoted for the target engine.
+    """
+    metrics = ', '.join(METRICS_TO_UNPIVOT)
+    target_columns = ''.join(
+        f"{metric_target}, " for metric_target in VARIANCE_TARGETS.values() if isinstance(metric_target, str)
+    )
+    target_cases = '\n'.join(
+        f"              WHEN '{metric}' THEN {metric_target}"
+        for metric, metric_target in VARIANCE_TARGETS.items()
     )
-    job = client.load_table_from_dataframe(
-        df_unpivoted, table_id, job_config=job_config
+    threshold_cases = '\n'.join(
+        f"              WHEN '{metric}' THEN {threshold!r}"
+        for metric, threshold in VARIANCE_THRESHOLDS.items()
     )
-    job.result()
-    print(f"Loaded {job.output_rows} rows into {table_id}.")
+    return f"""
+        SELECT
+          timestamp,
+          metric_name,
+          value,
+          target,
+          COALESCE(value - target, 0) AS deviation,
+          is_anomaly OR COALESCE(ABS(value - target) > threshold, FALSE) AS is_anomaly
+        FROM (
+          SELECT
+            timestamp,
+            is_anomaly,
+            metric_name,
+            value,
+            CASE metric_name
+{target_cases}
+            END AS target,
+            CASE metric_name
+{threshold_cases}
+            END AS threshold
+          FROM (
+            SELECT timestamp, is_anomaly, {target_columns}{metrics}
+            FROM {source_table}
+          )
+          UNPIVOT (value FOR metric_name IN ({metrics}))
+        )
+    """
 
-def populate_model_predictions():
+def build_variance_analysis_sql(source_table, target_table):
     """
-    Populates the model_predictions table with mock data.
+    Returns an INSERT ... SELECT statement equivalent to build_variance_analysis.
     """
-    client = bigquery.Client(project=PROJECT_ID)
-    
-    # Generate mock predictions
-    query = f"""
-        SELECT timestamp, actual_fcao
-        FROM `{PROJECT_ID}.{DATASET_ID}.{SOURCE_TABLE_ID}`
+    return f"""
+        INSERT INTO {target_table} (timestamp, metric_name, value, target, deviation, is_anomaly)
+        {build_variance_analysis_select_sql(source_table)}
     """
-    df = client.query(query).to_dataframe()
+
+def build_model_predictions(df):
+    df = df[['timestamp', 'actual_fcao']].copy()
     df['predicted_fcao'] = df['actual_fcao'] * 0.95 # Mock prediction
     df['prediction_confidence'] = 0.9
-    df = df[['timestamp', 'predicted_fcao', 'prediction_confidence']]
-
-    # Load the data into the model_predictions table
-    table_id = f"{PROJECT_ID}.{DATASET_ID}.{MODEL_PREDICTIONS_TABLE_ID}"
-    job_config = bigquery.LoadJobConfig(
-        write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
-    )
-    job = client.load_table_from_dataframe(
-        df, table_id, job_config=job_config
-    )
-    job.result()
-    print(f"Loaded {job.output_rows} rows into {table_id}.")
+    return df[['timestamp', 'predicted_fcao', 'prediction_confidence']]
 
-def populate_weekly_performance():
-    """
-    Populates the weekly_performance table with mock data.
-    """
-    client = bigquery.Client(project=PROJECT_ID)
-    
-    # Generate mock weekly performance data
+def build_weekly_performance():
     data = {
         'name': ['Week 1', 'Week 2', 'Week 3', 'Week 4'],
         'energy_mwh': [500, 520, 480, 510],
         'quality_pct': [98.5, 99.0, 98.0, 98.8],
         'warnings': [5, 3, 7, 4]
     }
-    df = pd.DataFrame(data)
+    return pd.DataFrame(data)
 
-    # Load the data into the weekly_performance table
-    table_id = f"{PROJECT_ID}.{DATASET_ID}.{WEEKLY_PERFORMANCE_TABLE_ID}"
-    job_config = bigquery.LoadJobConfig(
-        write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
-    )
-    job = client.load_table_from_dataframe(
-        df, table_id, job_config=job_config
-    )
-    job.result()
-    print(f"Loaded {job.output_rows} rows into {table_id}.")
+def build_correlation_data(df):
+    return df[['kiln_temperature', 'actual_fcao']].rename(columns={'kiln_temperature': 'temp', 'actual_fcao': 'fcao'})
 
-def populate_correlation_data():
+# --- Populate Steps --- #
+def populate_variance_analysis(pushdown=False):
     """
-    Populates the correlation_data table with mock data.
+    Populates the variance_analysis table with data from the simulated_kiln_data table.
+
+    With `pushdown=True` the unpivot runs as a single query inside the storage
+    engine that replaces the table contents in one job, and no rows pass
+    through this process.
+    """
+    storage = get_storage(PROJECT_ID, DATASET_ID)
+    if pushdown:
+        select_sql = build_variance_analysis_select_sql(storage.table_ref(SOURCE_TABLE_ID))
+        storage.materialize(select_sql, VARIANCE_ANALYSIS_TABLE_ID, mode=OVERWRITE, partition_field=PARTITION_FIELD)
+        print(f"Populated {VARIANCE_ANALYSIS_TABLE_ID} in place.")
+        return
+
+    df = _read_source(storage, SHARED_SOURCE_COLUMNS)
+    _load_table(storage, build_variance_analysis(df), VARIANCE_ANALYSIS_TABLE_ID)
+
+def populate_model_predictions(df=None):
     """
-    client = bigquery.Client(project=PROJECT_ID)
-    
-    # Generate mock correlation data
-    query = f"""
-        SELECT kiln_temperature, actual_fcao
-        FROM `{PROJECT_ID}.{DATASET_ID}.{SOURCE_TABLE_ID}`
+    Populates the model_predictions table with mock data, from `df` when the
+    source has already been read.
     """
-    df = client.query(query).to_dataframe()
-    df.rename(columns={'kiln_temperature': 'temp', 'actual_fcao': 'fcao'}, inplace=True)
+    storage = get_storage(PROJECT_ID, DATASET_ID)
+    if df is None:
+        df = _read_source(storage, ['timestamp', 'actual_fcao'])
+    _load_table(storage, build_model_predictions(df), MODEL_PREDICTIONS_TABLE_ID)
 
-    # Load the data into the correlation_data table
-    table_id = f"{PROJECT_ID}.{DATASET_ID}.{CORRELATION_DATA_TABLE_ID}"
-    job_config = bigquery.LoadJobConfig(
-        write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
-    )
-    job = client.load_table_from_dataframe(
-        df, table_id, job_config=job_config
-    )
-    job.result()
-    print(f"Loaded {job.output_rows} rows into {table_id}.")
+def populate_weekly_performance():
+    """
+    Populates the weekly_performance table with mock data.
+    """
+    storage = get_storage(PROJECT_ID, DATASET_ID)
+    _load_table(storage, build_weekly_performance(), WEEKLY_PERFORMANCE_TABLE_ID)
+
+def populate_correlation_data(df=None):
+    """
+    Populates the correlation_data table with mock data, from `df` when the
+    source has already been read.
+    """
+    storage = get_storage(PROJECT_ID, DATASET_ID)
+    if df is None:
+        df = _read_source(storage, ['kiln_temperature', 'actual_fcao'])
+    _load_table(storage, build_correlation_data(df), CORRELATION_DATA_TABLE_ID)
+
+def populate_all_analysis_tables():
+    """
+    Populates every derived analysis table from a single scan of the source table.
+
+    The source is read once with only the columns the derivations need, each
+    table is derived from that shared frame, and the uploads run as parallel
+    writes on one shared storage backend.
+    """
+    storage = get_storage(PROJECT_ID, DATASET_ID)
+    df = read_source()
+
+    tables = {
+        VARIANCE_ANALYSIS_TABLE_ID: build_variance_analysis(df),
+        MODEL_PREDICTIONS_TABLE_ID: build_model_predictions(df),
+        WEEKLY_PERFORMANCE_TABLE_ID: build_weekly_performance(),
+        CORRELATION_DATA_TABLE_ID: build_correlation_data(df),
+    }
+    with ThreadPoolExecutor(max_workers=len(tables)) as executor:
+        futures = [
+            executor.submit(_load_table, storage, table_df, table_name)
+            for table_name, table_df in tables.items()
+        ]
+        for future in futures:
+            future.result()
 
 if __name__ == "__main__":
-    populate_variance_analysis()
-    populate_model_predictions()
-    populate_weekly_performance()
-    populate_correlation_data()
+    populate_all_analysis_tables()
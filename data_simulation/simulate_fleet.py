@@ -0,0 +1,95 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from simulate_kiln_data import generate_kiln_data_vectorized
+
+# --- Configuration --- #
+DEFAULT_FLEET_SEED = 2023
+SUBMIT_WINDOW_PER_WORKER = 2  # Kilns queued or running per worker process
+
+def kiln_ids(num_kilns):
+    return [f"kiln_{i + 1:03d}" for i in range(num_kilns)]
+
+def spawn_kiln_seeds(num_kilns, seed=DEFAULT_FLEET_SEED):
+    """
+    Returns one independent SeedSequence per kiln.
+
+    Seeds are derived from the kiln's position in the fleet, not from the worker
+    that happens to run it, so results do not depend on the number of workers.
+    """
+    return np.random.SeedSequence(seed).spawn(num_kilns)
+
+def simulate_kiln(kiln_id, seed_seq, num_days, start_date):
+    """
+    Simulates a single kiln and tags every row and alert with its kiln_id.
+    """
+    df, alerts_df = generate_kiln_data_vectorized(num_days=num_days, start_date=start_date, seed=seed_seq)
+    df.insert(0, 'kiln_id', kiln_id)
+    alerts_df.insert(0, 'kiln_id', kiln_id)
+    return df, alerts_df
+
+def _write_kiln(kiln_id, seed_seq, num_days, start_date, output_dir):
+    df, alerts_df = simulate_kiln(kiln_id, seed_seq, num_days, start_date)
+    data_path = os.path.join(output_dir, f"{kiln_id}.parquet")
+    alerts_path = os.path.join(output_dir, f"{kiln_id}_alerts.parquet")
+    df.to_parquet(data_path, index=False)
+    alerts_df.to_parquet(alerts_path, index=False)
+    return data_path, alerts_path
+
+def _map_kilns(worker, num_kilns, num_days, start_date, seed, max_workers, *extra_args):
+    ids = kiln_ids(num_kilns)
+    seeds = spawn_kiln_seeds(num_kilns, seed)
+    args = [ids, seeds, [num_days] * num_kilns, [start_date] * num_kilns]
+    args += [[arg] * num_kilns for arg in extra_args]
+    if max_workers == 1:
+        yield from map(worker, *args)
+        return
+    # executor.map would submit every kiln up front, holding all their results
+    # until consumed; keep only a few tasks per worker in flight instead
+    max_workers = max_workers or os.cpu_count() or 1
+    window = max_workers * SUBMIT_WINDOW_PER_WORKER
+    tasks = zip(*args)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = deque(executor.submit(worker, *task) for task in islice(tasks, window))
+        while in_flight:
+            result = in_flight.popleft().result()
+            for task in islice(tasks, 1):
+                in_flight.append(executor.submit(worker, *task))
+            yield result
+
+def iter_fleet(num_kilns, num_days=7, start_date=datetime(2023, 1, 1), seed=DEFAULT_FLEET_SEED, max_workers=None):
+    """
+    Yields (df, alerts_df) per kiln, in kiln order, as the process pool finishes them.
+    """
+    yield from _map_kilns(simulate_kiln, num_kilns, num_days, start_date, seed, max_workers)
+
+def simulate_fleet(num_kilns, num_days=7, start_date=datetime(2023, 1, 1), seed=DEFAULT_FLEET_SEED, max_workers=None):
+    """
+    Simulates `num_kilns` independent kilns on a process pool and merges them.
+
+    Returns (df, alerts_df) with a leading kiln_id column, ordered by kiln.
+    Use max_workers=1 to run in-process.
+    """
+    results = list(iter_fleet(num_kilns, num_days, start_date, seed, max_workers))
+    df = pd.concat([df for df, _ in results], ignore_index=True)
+    alerts_df = pd.concat([alerts_df for _, alerts_df in results], ignore_index=True)
+    return df, alerts_df
+
+def write_fleet(output_dir, num_kilns, num_days=7, start_date=datetime(2023, 1, 1), seed=DEFAULT_FLEET_SEED, max_workers=None):
+    """
+    Simulates `num_kilns` kilns on a process pool, writing one Parquet file per
+    kiln (plus one for its alerts) from inside each worker.
+
+    Only file paths travel back to the parent process, so throughput is not
+    bounded by pickling DataFrames. Returns a list of (data_path, alerts_path).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    return list(_map_kilns(_write_kiln, num_kilns, num_days, start_date, seed, max_workers, output_dir))
+
+if __name__ == "__main__":
+    df, alerts_df = simulate_fleet(num_kilns=os.cpu_count() or 1)
+    print(f"Generated {len(df)} rows and {len(alerts_df)} alerts for {df['kiln_id'].nunique()} kilns.")
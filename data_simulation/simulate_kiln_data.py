@@ -78,4 +78,122 @@ def generate_kiln_data(num_days=7, start_date=datetime(2023, 1, 1)):
     df = pd.DataFrame(data)
     alerts_df = pd.DataFrame(alerts)
     
-    return df, alerts_df
\ No newline at end of file
+    return df, alerts_df
+
+# --- Vectorized Engine --- #
+MINUTES_PER_DAY = 24 * 60
+
+# (period in minutes, offset within period, column, message, alert type).
+# The order matches the order in which generate_kiln_data checks them, so
+# alerts raised on the same minute keep the same relative ordering and ids.
+ANOMALY_RULES = [
+    (24 * 60, 1000, 'kiln_temperature', 'Kiln temperature dropped significantly', 'Warning'),
+    (12 * 60, 300, 'vibration', 'High vibration detected in the kiln', 'Critical'),
+    (24 * 60, 500, 'pressure', 'Kiln pressure is unusually high', 'Warning'),
+    (24 * 60, 1500, 'oxygen', 'Low oxygen level in the kiln', 'Critical'),
+]
+
+def _simulate_block(rng, start_date, first_minute, num_minutes, first_alert_id=1):
+    """
+    Simulates `num_minutes` consecutive minutes as whole NumPy arrays.
+
+    `first_minute` is the index of the first row relative to `start_date`, so
+    anomaly schedules and diurnal terms line up with a single full-length run.
+    Alert ids are numbered from `first_alert_id`.
+    """
+    minute_index = np.arange(first_minute, first_minute + num_minutes)
+    timestamps = pd.date_range(start_date + timedelta(minutes=int(first_minute)), periods=num_minutes, freq='min')
+
+    hour_angle = timestamps.hour.to_numpy() / 24 * 2 * np.pi
+    minute_angle = timestamps.minute.to_numpy() / 60 * 2 * np.pi
+    sin_hour, cos_hour = np.sin(hour_angle), np.cos(hour_angle)
+
+    # --- Base Simulation ---
+    actual_fcao = rng.normal(loc=2.0, scale=0.1, size=num_minutes) + sin_hour * 0.05
+    np.clip(actual_fcao, 1.8, 2.2, out=actual_fcao)
+
+    raw_material_feed_rate = rng.normal(loc=100, scale=2, size=num_minutes) + np.sin(minute_angle) * 1
+    kiln_temperature = rng.normal(loc=1450, scale=5, size=num_minutes) + cos_hour * 2
+    fuel_consumption = rng.normal(loc=80, scale=2, size=num_minutes) + sin_hour * 0.5
+    vibration = rng.normal(loc=0.5, scale=0.05, size=num_minutes)
+    motor_current_draw = rng.normal(loc=50, scale=1, size=num_minutes) + np.cos(minute_angle) * 0.5
+    pressure = rng.normal(loc=50, scale=2, size=num_minutes)
+    oxygen = rng.normal(loc=2.5, scale=0.05, size=num_minutes)
+
+    # --- Anomaly Injection ---
+    masks = [minute_index % period == offset for period, offset, _, _, _ in ANOMALY_RULES]
+    kiln_temperature[masks[0]] -= 100
+    vibration[masks[1]] *= 5
+    pressure[masks[2]] += 30
+    oxygen[masks[3]] -= 1.5
+    is_anomaly = np.logical_or.reduce(masks)
+
+    clinker_production = raw_material_feed_rate * 0.6  # Assume 60% conversion rate
+    energy_consumption_kwh = fuel_consumption * 1000 # Assume conversion factor
+    with np.errstate(divide='ignore', invalid='ignore'):
+        specific_energy_consumption = np.where(
+            clinker_production > 0, energy_consumption_kwh / clinker_production, 0.0
+        )
+
+    df = pd.DataFrame({
+        'timestamp': timestamps,
+        'actual_fcao': actual_fcao,
+        'raw_material_feed_rate': raw_material_feed_rate,
+        'kiln_temperature': kiln_temperature,
+        'fuel_consumption': fuel_consumption,
+        'vibration': vibration,
+        'motor_current_draw': motor_current_draw,
+        'pressure': pressure,
+        'oxygen': oxygen,
+        'clinker_production': clinker_production,
+        'energy_consumption_kwh': energy_consumption_kwh,
+        'specific_energy_consumption': specific_energy_consumption,
+        'target_kiln_temperature': 1450,
+        'target_fuel_consumption': 80,
+        'is_anomaly': is_anomaly,
+    })
+
+    # Collect alerts ordered by minute, then by rule order within a minute.
+    rows = [np.flatnonzero(mask) for mask in masks]
+    rule = np.concatenate([np.full(len(r), k) for k, r in enumerate(rows)])
+    rows = np.concatenate(rows)
+    order = np.lexsort((rule, rows))
+    rows, rule = rows[order], rule[order]
+    alerts_df = pd.DataFrame({
+        'id': np.arange(first_alert_id, first_alert_id + len(rows)),
+        'message': [ANOMALY_RULES[k][3] for k in rule],
+        'timestamp': timestamps[rows],
+        'type': [ANOMALY_RULES[k][4] for k in rule],
+    })
+
+    return df, alerts_df
+
+def generate_kiln_data_vectorized(num_days=7, start_date=datetime(2023, 1, 1), seed=None):
+    """
+    Columnar equivalent of generate_kiln_data.
+
+    Every sensor series, diurnal term and anomaly mask is built as a whole array
+    in one pass instead of one Python iteration per minute. Returns the same
+    columns and alert rows as generate_kiln_data; pass `seed` for reproducible
+    sensor values.
+    """
+    rng = np.random.default_rng(seed)
+    return _simulate_block(rng, start_date, 0, num_days * MINUTES_PER_DAY)
+
+def iter_kiln_data_chunks(num_days=7, start_date=datetime(2023, 1, 1), seed=None, chunk_minutes=MINUTES_PER_DAY):
+    """
+    Yields (df, alerts_df) chunks of at most `chunk_minutes` rows each.
+
+    The minute index and the alert id counter carry across chunk boundaries, so
+    concatenating the chunks gives the same timestamps, anomaly schedule and
+    alert ids as generate_kiln_data_vectorized. Only one chunk is held in memory
+    at a time.
+    """
+    rng = np.random.default_rng(seed)
+    total_minutes = num_days * MINUTES_PER_DAY
+    next_alert_id = 1
+    for first_minute in range(0, total_minutes, chunk_minutes):
+        num_minutes = min(chunk_minutes, total_minutes - first_minute)
+        df, alerts_df = _simulate_block(rng, start_date, first_minute, num_minutes, next_alert_id)
+        next_alert_id += len(alerts_df)
+        yield df, alerts_df
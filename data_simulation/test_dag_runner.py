@@ -0,0 +1,76 @@
+import threading
+import pytest
+from dag_runner import DagRunner
+
+def test_steps_start_after_their_dependencies_finish():
+    order = []
+    lock = threading.Lock()
+
+    def step(name):
+        def run():
+            with lock:
+                order.append(name)
+        return run
+
+    dag = DagRunner(max_workers=4)
+    dag.add("load", step("load"))
+    dag.add("tables", step("tables"))
+    dag.add("predictions", step("predictions"), deps=["load", "tables"])
+    dag.add("variance", step("variance"), deps=["load"])
+    dag.add("weekly", step("weekly"), deps=["predictions", "variance"])
+    dag.run()
+
+    assert sorted(order) == sorted(dag.steps)
+    assert order.index("predictions") > max(order.index("load"), order.index("tables"))
+    assert order.index("variance") > order.index("load")
+    assert order[-1] == "weekly"
+    for step in dag.steps.values():
+        for dep in step.deps:
+            assert dag.steps[dep].end <= step.start
+
+def test_independent_steps_run_concurrently():
+    barrier = threading.Barrier(2, timeout=5)
+    dag = DagRunner(max_workers=2)
+    # Each step waits for the other, so this only finishes if both run at once
+    dag.add("a", barrier.wait)
+    dag.add("b", barrier.wait)
+    dag.run()
+
+def test_failure_skips_dependents_and_reraises_the_first_error():
+    ran = []
+
+    def fail():
+        raise RuntimeError("load failed")
+
+    dag = DagRunner(max_workers=2)
+    dag.add("load", fail)
+    dag.add("tables", lambda: ran.append("tables"))
+    dag.add("predictions", lambda: ran.append("predictions"), deps=["load", "tables"])
+    dag.add("weekly", lambda: ran.append("weekly"), deps=["predictions"])
+
+    with pytest.raises(RuntimeError, match="load failed"):
+        dag.run()
+    assert ran == ["tables"]
+    assert isinstance(dag.steps["load"].error, RuntimeError)
+    assert dag.steps["predictions"].start is None
+    assert dag.steps["weekly"].start is None
+
+@pytest.mark.parametrize("steps", [
+    [("a", ["missing"])],
+    [("a", ["b"]), ("b", ["a"])],
+])
+def test_invalid_graphs_are_rejected_before_running(steps):
+    ran = []
+    dag = DagRunner()
+    for name, deps in steps:
+        dag.add(name, lambda: ran.append(name), deps=deps)
+
+    with pytest.raises(ValueError):
+        dag.run()
+    assert ran == []
+
+def test_duplicate_step_names_are_rejected():
+    dag = DagRunner().add("a", lambda: None)
+
+    with pytest.raises(ValueError):
+        dag.add("a", lambda: None)
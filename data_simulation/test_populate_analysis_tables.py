@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+import populate_analysis_tables
+from populate_analysis_tables import build_variance_analysis, build_variance_analysis_sql
+from simulate_kiln_data import generate_kiln_data_vectorized
+
+duckdb = pytest.importorskip("duckdb")
+
+def _sorted(df):
+    return df.sort_values(['metric_name', 'timestamp']).reset_index(drop=True)
+
+def test_variance_analysis_sql_matches_pandas():
+    source_df, _ = generate_kiln_data_vectorized(num_days=2, seed=7)
+    source_df['target_kiln_temperature'] = source_df['target_kiln_temperature'].astype(float)
+    source_df['target_fuel_consumption'] = source_df['target_fuel_consumption'].astype(float)
+    # Push a few rows past every threshold
+    source_df.loc[::97, 'kiln_temperature'] += 60
+    source_df.loc[::89, 'fuel_consumption'] -= 15
+    source_df.loc[::83, 'actual_fcao'] = 2.3
+
+    con = duckdb.connect()
+    con.register('source_view', source_df)
+    con.execute("CREATE TABLE simulated_kiln_data AS SELECT * FROM source_view")
+    con.execute("""
+        CREATE TABLE variance_analysis (
+          timestamp TIMESTAMP, metric_name VARCHAR, value DOUBLE,
+          target DOUBLE, deviation DOUBLE, is_anomaly BOOLEAN
+        )
+    """)
+    con.execute(build_variance_analysis_sql('simulated_kiln_data', 'variance_analysis'))
+    sql_df = _sorted(con.execute("SELECT * FROM variance_analysis").df())
+
+    pandas_df = _sorted(build_variance_analysis(source_df))
+    pandas_df = pandas_df[sql_df.columns.tolist()]
+
+    assert len(sql_df) == len(pandas_df) == len(source_df) * 11
+    assert pandas_df['is_anomaly'].sum() > source_df['is_anomaly'].sum()
+    pd.testing.assert_frame_equal(sql_df, pandas_df, check_dtype=False, check_exact=False, rtol=1e-12)
+
+def test_single_scan_populates_the_same_tables_as_the_per_table_steps(tmp_path, monkeypatch):
+    from kiln_storage.local_backend import LocalStorage
+
+    source_df, _ = generate_kiln_data_vectorized(num_days=1, seed=7)
+    source_df.loc[::97, 'kiln_temperature'] += 60
+    source_df.loc[::83, 'actual_fcao'] = 2.3
+    per_table, single_scan = LocalStorage(str(tmp_path / "per_table")), LocalStorage(str(tmp_path / "single_scan"))
+    for storage in (per_table, single_scan):
+        storage.write_table(source_df, 'simulated_kiln_data')
+
+    monkeypatch.setattr(populate_analysis_tables, "get_storage", lambda *args: per_table)
+    populate_analysis_tables.populate_variance_analysis()
+    populate_analysis_tables.populate_model_predictions()
+    populate_analysis_tables.populate_weekly_performance()
+    populate_analysis_tables.populate_correlation_data()
+
+    source_reads = []
+    read_table = single_scan.read_table
+    monkeypatch.setattr(single_scan, "read_table", lambda table_name, *args, **kwargs: source_reads.append(table_name)
+                        or read_table(table_name, *args, **kwargs))
+    monkeypatch.setattr(populate_analysis_tables, "get_storage", lambda *args: single_scan)
+    populate_analysis_tables.populate_all_analysis_tables()
+
+    assert source_reads == ['simulated_kiln_data']
+    for table_name, order in [('variance_analysis', ['metric_name', 'timestamp']), ('model_predictions', ['timestamp']),
+                              ('weekly_performance', ['name']), ('correlation_data', ['temp', 'fcao'])]:
+        expected = per_table.read_table(table_name).sort_values(order, ignore_index=True)
+        actual = read_table(table_name).sort_values(order, ignore_index=True)
+        pd.testing.assert_frame_equal(actual, expected)
+    assert read_table('variance_analysis')['is_anomaly'].sum() > source_df['is_anomaly'].sum()
@@ -0,0 +1,32 @@
+import pandas as pd
+from simulate_fleet import iter_fleet, simulate_fleet, simulate_kiln, spawn_kiln_seeds, write_fleet
+
+def test_kiln_results_do_not_depend_on_worker_count():
+    serial_df, serial_alerts = simulate_fleet(4, num_days=1, seed=11, max_workers=1)
+    pooled_df, pooled_alerts = simulate_fleet(4, num_days=1, seed=11, max_workers=2)
+
+    pd.testing.assert_frame_equal(serial_df, pooled_df)
+    pd.testing.assert_frame_equal(serial_alerts, pooled_alerts)
+    assert serial_df['kiln_id'].unique().tolist() == ['kiln_001', 'kiln_002', 'kiln_003', 'kiln_004']
+
+def test_kiln_seed_depends_only_on_its_position():
+    # Kiln 2 of a 3-kiln fleet is the same as kiln 2 of a 5-kiln fleet
+    small, _ = simulate_kiln('kiln_002', spawn_kiln_seeds(3, seed=11)[1], 1, pd.Timestamp("2023-01-01"))
+    large = list(iter_fleet(5, num_days=1, start_date=pd.Timestamp("2023-01-01"), seed=11, max_workers=1))[1][0]
+
+    pd.testing.assert_frame_equal(small, large)
+
+def test_kilns_are_independent():
+    df, _ = simulate_fleet(2, num_days=1, seed=11, max_workers=1)
+    first, second = (group['kiln_temperature'].to_numpy() for _, group in df.groupby('kiln_id'))
+
+    assert not (first == second).all()
+
+def test_write_fleet_keeps_kiln_order_past_the_submission_window(tmp_path):
+    # More kilns than the two-per-worker submission window
+    paths = write_fleet(str(tmp_path), 6, num_days=1, seed=11, max_workers=2)
+
+    assert [data_path for data_path, _ in paths] == [str(tmp_path / f"kiln_{i:03d}.parquet") for i in range(1, 7)]
+    expected, _ = simulate_fleet(6, num_days=1, seed=11, max_workers=1)
+    written = pd.concat([pd.read_parquet(data_path) for data_path, _ in paths], ignore_index=True)
+    pd.testing.assert_frame_equal(written, expected, check_dtype=False)
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+from simulate_kiln_data import generate_kiln_data, generate_kiln_data_vectorized, iter_kiln_data_chunks
+
+NUM_DAYS = 2
+
+def test_vectorized_matches_loop():
+    loop_df, loop_alerts = generate_kiln_data(num_days=NUM_DAYS)
+    df, alerts_df = generate_kiln_data_vectorized(num_days=NUM_DAYS, seed=0)
+
+    assert list(df.columns) == list(loop_df.columns)
+    assert len(df) == len(loop_df) == NUM_DAYS * 24 * 60
+    assert (pd.to_datetime(df['timestamp']) == pd.to_datetime(loop_df['timestamp'])).all()
+    assert df['is_anomaly'].tolist() == loop_df['is_anomaly'].tolist()
+    for column in ['target_kiln_temperature', 'target_fuel_consumption']:
+        assert df[column].tolist() == loop_df[column].tolist()
+
+    assert list(alerts_df.columns) == list(loop_alerts.columns)
+    assert alerts_df.drop(columns='timestamp').equals(loop_alerts.drop(columns='timestamp'))
+    assert (pd.to_datetime(alerts_df['timestamp']) == pd.to_datetime(loop_alerts['timestamp'])).all()
+
+def test_vectorized_derived_columns_follow_the_loop_formulas():
+    df, _ = generate_kiln_data_vectorized(num_days=NUM_DAYS, seed=0)
+
+    assert df['actual_fcao'].between(1.8, 2.2).all()
+    np.testing.assert_allclose(df['clinker_production'], df['raw_material_feed_rate'] * 0.6)
+    np.testing.assert_allclose(df['energy_consumption_kwh'], df['fuel_consumption'] * 1000)
+    np.testing.assert_allclose(df['specific_energy_consumption'],
+                               df['energy_consumption_kwh'] / df['clinker_production'])
+
+def test_vectorized_is_reproducible_with_a_seed():
+    first, _ = generate_kiln_data_vectorized(num_days=1, seed=42)
+    second, _ = generate_kiln_data_vectorized(num_days=1, seed=42)
+
+    pd.testing.assert_frame_equal(first, second)
+
+def test_chunks_concatenate_to_the_one_shot_run():
+    df, alerts_df = generate_kiln_data_vectorized(num_days=NUM_DAYS, seed=0)
+    # 1000 minutes does not divide a day, so chunks split the anomaly schedule unevenly
+    chunks = list(iter_kiln_data_chunks(num_days=NUM_DAYS, seed=0, chunk_minutes=1000))
+    chunked_df = pd.concat([chunk for chunk, _ in chunks], ignore_index=True)
+    chunked_alerts = pd.concat([alerts for _, alerts in chunks], ignore_index=True)
+
+    assert [len(chunk) for chunk, _ in chunks] == [1000, 1000, 880]
+    assert list(chunked_df.columns) == list(df.columns)
+    assert chunked_df['timestamp'].equals(df['timestamp'])
+    assert chunked_df['is_anomaly'].equals(df['is_anomaly'])
+    pd.testing.assert_frame_equal(chunked_alerts, alerts_df)
+
+def test_alert_ids_continue_across_chunks():
+    chunks = list(iter_kiln_data_chunks(num_days=NUM_DAYS, seed=0, chunk_minutes=1000))
+    ids = [alerts['id'].tolist() for _, alerts in chunks]
+
+    assert all(ids)
+    assert sum(ids, []) == list(range(1, sum(map(len, ids)) + 1))
+    for previous, following in zip(ids, ids[1:]):
+        assert following[0] == previous[-1] + 1
@@ -0,0 +1,38 @@
+"""
+Pluggable table storage.
+
+`get_storage` returns the backend selected by the STORAGE_BACKEND environment
+variable: "bigquery" (default) talks to BigQuery, "local" keeps Parquet files
+under LOCAL_STORAGE_DIR and queries them with DuckDB, so pipelines can run and
+be benchmarked without the cloud.
+"""
+import os
+from functools import lru_cache
+from .base import APPEND, OVERWRITE, StorageBackend, arrow_to_pandas
+
+# --- Configuration --- #
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "bigquery")
+LOCAL_STORAGE_DIR = os.getenv("LOCAL_STORAGE_DIR", os.path.join(os.path.dirname(__file__), "..", ".local_storage"))
+DEFAULT_PROJECT_ID = os.getenv("GCP_PROJECT_ID", "operations-472416")
+DEFAULT_DATASET_ID = "kiln_data_dataset"
+
+@lru_cache(maxsize=None)
+def get_storage(project_id=DEFAULT_PROJECT_ID, dataset_id=DEFAULT_DATASET_ID, backend=None):
+    """
+    Returns the shared storage backend for a dataset.
+
+    Backends are created once per (project_id, dataset_id, backend) and reused.
+    The local backend keeps one directory per dataset.
+    """
+    backend = backend or STORAGE_BACKEND
+    if backend == "bigquery":
+        from .bigquery_backend import BigQueryStorage
+
+        return BigQueryStorage(project_id, dataset_id)
+    if backend == "local":
+        from .local_backend import LocalStorage
+
+        return LocalStorage(os.path.join(LOCAL_STORAGE_DIR, dataset_id))
+    raise ValueError(f"Unknown STORAGE_BACKEND '{backend}', expected 'bigquery' or 'local'.")
+
+__all__ = ["APPEND", "OVERWRITE", "StorageBackend", "arrow_to_pandas", "get_storage"]
@@ -0,0 +1,93 @@
+from abc import ABC, abstractmethod
+import pandas as pd
+
+# --- Write Modes --- #
+OVERWRITE = "overwrite"
+APPEND = "append"
+
+def arrow_to_pandas(table, zero_copy=False):
+    """
+    Converts a `pyarrow.Table` to a DataFrame.
+
+    With `zero_copy` the columns stay Arrow-backed (`pd.ArrowDtype`) and share
+    the Arrow buffers; otherwise they become NumPy-backed, one block per
+    column so pandas does not copy them again to consolidate.
+    """
+    if zero_copy:
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+    return table.to_pandas(split_blocks=True)
+
+class StorageBackend(ABC):
+    """
+    Table storage used by the simulation, training, pipeline and backend code.
+
+    SQL passed to `query` and `materialize` should reference tables through
+    `table_ref` and parameters as `@name`, and stick to syntax both BigQuery
+    and DuckDB accept. Schemas are lists of `bigquery.SchemaField`-like objects
+    (anything with `name`, `field_type` and `mode` attributes).
+
+    Writers pass `partition_field` for tables that are read by time window, so
+    `WHERE <field> BETWEEN ...` filters only touch the matching days.
+    """
+
+    @abstractmethod
+    def table_ref(self, table_name):
+        """Returns `table_name` quoted for use inside SQL."""
+
+    @abstractmethod
+    def query(self, sql, params=None):
+        """Runs `sql` with `params` bound to `@name` placeholders and returns a DataFrame."""
+
+    @abstractmethod
+    def write_table(self, df, table_name, mode=OVERWRITE, schema=None, partition_field=None):
+        """Writes `df` into `table_name` and returns the number of rows written."""
+
+    @abstractmethod
+    def materialize(self, sql, table_name, mode=OVERWRITE, params=None, partition_field=None):
+        """Writes the result of `sql` into `table_name` inside the engine."""
+
+    @abstractmethod
+    def upsert_row(self, table_name, key_column, row, schema=None):
+        """Inserts `row` (a dict), or updates the row with the same `key_column` value, atomically."""
+
+    @abstractmethod
+    def table_exists(self, table_name):
+        pass
+
+    @abstractmethod
+    def create_table(self, table_name, schema, partition_field=None):
+        """Creates an empty table if it does not exist; returns True if it was created."""
+
+    def ensure_dataset(self):
+        """Creates the dataset that holds the tables, if the backend has one."""
+
+    def drop_if_partitioned_differently(self, table_name, partition_field):
+        """
+        Drops `table_name` when it exists with a partitioning other than
+        `partition_field` and returns True. Only backends that fix a table's
+        partitioning at creation need to; the default does nothing.
+        """
+        return False
+
+    def query_arrow(self, sql, params=None):
+        """Like `query`, but returns a `pyarrow.Table`."""
+        import pyarrow as pa
+
+        return pa.Table.from_pandas(self.query(sql, params), preserve_index=False)
+
+    def iter_batches(self, sql, params=None):
+        """Yields the result of `sql` as `pyarrow.RecordBatch`es, streaming where the backend can."""
+        yield from self.query_arrow(sql, params).to_batches()
+
+    def _select_all(self, table_name, columns):
+        select = ', '.join(columns) if columns else '*'
+        return f"SELECT {select} FROM {self.table_ref(table_name)}"
+
+    def read_table_arrow(self, table_name, columns=None):
+        return self.query_arrow(self._select_all(table_name, columns))
+
+    def iter_table_batches(self, table_name, columns=None):
+        yield from self.iter_batches(self._select_all(table_name, columns))
+
+    def read_table(self, table_name, columns=None, zero_copy=False):
+        return arrow_to_pandas(self.read_table_arrow(table_name, columns), zero_copy)
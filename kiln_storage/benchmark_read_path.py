@@ -0,0 +1,130 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from google.cloud import bigquery
+from google.cloud.bigquery.table import RowIterator
+from kiln_storage import arrow_to_pandas
+from kiln_storage.local_backend import LocalStorage
+
+# --- Configuration --- #
+# Roughly the size of variance_analysis for a week of simulated data
+BENCHMARK_ROWS = 110_000
+REST_PAGE_ROWS = 10_000  # tabledata.list page size used by the REST path
+
+SCHEMA = [
+    bigquery.SchemaField("timestamp", "TIMESTAMP"),
+    bigquery.SchemaField("metric", "STRING"),
+    bigquery.SchemaField("actual_value", "FLOAT"),
+    bigquery.SchemaField("target_value", "FLOAT"),
+    bigquery.SchemaField("variance", "FLOAT"),
+    bigquery.SchemaField("is_significant", "BOOLEAN"),
+]
+
+def make_variance_frame(num_rows):
+    rng = np.random.default_rng(0)
+    actual = rng.normal(1450, 20, num_rows)
+    target = np.full(num_rows, 1450.0)
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2023-01-01", periods=num_rows, freq="min", tz="UTC"),
+        "metric": rng.choice(["kiln_temperature", "fuel_consumption", "actual_fcao"], num_rows),
+        "actual_value": actual,
+        "target_value": target,
+        "variance": actual - target,
+        "is_significant": np.abs(actual - target) > 50,
+    })
+
+def rest_pages(df):
+    """
+    Encodes `df` the way tabledata.list / getQueryResults return rows: JSON
+    pages of {"f": [{"v": "<string>"}]} with int64 microsecond timestamps.
+    """
+    micros = df["timestamp"].astype("datetime64[us, UTC]").astype("int64").astype(str)
+    columns = [micros] + [df[c].astype(str) for c in ["metric", "actual_value", "target_value", "variance"]]
+    columns.append(df["is_significant"].map({True: "true", False: "false"}))
+    rows = [{"f": [{"v": v} for v in values]} for values in zip(*columns)]
+    pages = []
+    for start in range(0, len(rows), REST_PAGE_ROWS):
+        end = start + REST_PAGE_ROWS
+        page = {"rows": rows[start:end], "totalRows": str(len(rows))}
+        if end < len(rows):
+            page["pageToken"] = str(end)
+        pages.append(json.dumps(page).encode())
+    return pages
+
+def read_rest(pages):
+    # The library's own JSON decoding path, fed from memory instead of HTTP
+    def api_request(method, path, query_params=None, **kwargs):
+        token = (query_params or {}).get("pageToken")
+        return json.loads(pages[int(token) // REST_PAGE_ROWS if token else 0])
+
+    iterator = RowIterator(client=None, api_request=api_request, path="/rows", schema=SCHEMA)
+    return iterator.to_dataframe(create_bqstorage_client=False)
+
+def ipc_stream(df):
+    """
+    Encodes `df` as an Arrow IPC stream, the format ReadRows responses carry.
+    """
+    sink = pa.BufferOutputStream()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table, max_chunksize=REST_PAGE_ROWS)
+    return sink.getvalue()
+
+def read_arrow(buffer, zero_copy=False):
+    return arrow_to_pandas(pa.ipc.open_stream(buffer).read_all(), zero_copy)
+
+def time_best(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def run_benchmark(num_rows=BENCHMARK_ROWS, repeats=3):
+    """
+    Compares decoding a query result from REST JSON pages against Arrow
+    record batches, plus a full read from the local Parquet stand-in.
+    """
+    df = make_variance_frame(num_rows)
+    pages = rest_pages(df)
+    buffer = ipc_stream(df)
+
+    rest_time, rest_df = time_best(lambda: read_rest(pages), repeats)
+    arrow_time, arrow_df = time_best(lambda: read_arrow(buffer), repeats)
+    zero_copy_time, _ = time_best(lambda: read_arrow(buffer, zero_copy=True), repeats)
+    pd.testing.assert_frame_equal(rest_df, arrow_df, check_dtype=False)
+
+    with tempfile.TemporaryDirectory() as root_dir:
+        storage = LocalStorage(root_dir)
+        storage.write_table(df, "variance_analysis")
+        local_time, _ = time_best(lambda: storage.read_table("variance_analysis"), repeats)
+        stream_time, batches = time_best(lambda: list(storage.iter_table_batches("variance_analysis")), repeats)
+
+    print(f"{num_rows} rows, best of {repeats}")
+    print(f"{'REST JSON pages':<28} {rest_time * 1000:9.1f} ms")
+    for label, elapsed in [
+        ("Arrow batches -> pandas", arrow_time),
+        ("Arrow batches, zero-copy", zero_copy_time),
+        ("local read_table", local_time),
+        (f"local stream ({len(batches)} batches)", stream_time),
+    ]:
+        print(f"{label:<28} {elapsed * 1000:9.1f} ms   {rest_time / elapsed:6.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark REST JSON against Arrow reads on a local stand-in.")
+    parser.add_argument("--rows", type=int, default=BENCHMARK_ROWS)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    run_benchmark(args.rows, args.repeats)
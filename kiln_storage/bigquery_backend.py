@@ -0,0 +1,210 @@
+from datetime import date, datetime
+from functools import lru_cache
+import numbers
+import os
+import google.auth
+from google.auth.transport.requests import AuthorizedSession
+from google.cloud import bigquery
+from google.api_core.exceptions import NotFound
+import numpy as np
+from requests.adapters import HTTPAdapter
+from .base import APPEND, OVERWRITE, StorageBackend
+
+# --- Connection Pool --- #
+# Max keep-alive connections per host; size it to the number of concurrent queries
+BIGQUERY_HTTP_POOL_SIZE = int(os.getenv("BIGQUERY_HTTP_POOL_SIZE", "32"))
+BIGQUERY_HTTP_MAX_RETRIES = int(os.getenv("BIGQUERY_HTTP_MAX_RETRIES", "3"))
+
+_WRITE_DISPOSITIONS = {
+    OVERWRITE: bigquery.WriteDisposition.WRITE_TRUNCATE,
+    APPEND: bigquery.WriteDisposition.WRITE_APPEND,
+}
+
+@lru_cache(maxsize=None)
+def get_bigquery_client(project_id):
+    """
+    Returns the process-wide BigQuery client for `project_id`.
+
+    Credential discovery runs once and every caller shares one authorized
+    HTTP session whose connection pool is sized by BIGQUERY_HTTP_POOL_SIZE,
+    so concurrent requests reuse warm TLS connections instead of opening new
+    ones.
+    """
+    credentials, _ = google.auth.default(scopes=bigquery.Client.SCOPE)
+    session = AuthorizedSession(credentials)
+    adapter = HTTPAdapter(
+        pool_connections=BIGQUERY_HTTP_POOL_SIZE,
+        pool_maxsize=BIGQUERY_HTTP_POOL_SIZE,
+        max_retries=BIGQUERY_HTTP_MAX_RETRIES,
+    )
+    session.mount("https://", adapter)
+    return bigquery.Client(project=project_id, credentials=credentials, _http=session)
+
+@lru_cache(maxsize=None)
+def get_bqstorage_client():
+    """
+    Returns the process-wide BigQuery Storage Read API client, or None when
+    google-cloud-bigquery-storage is not installed.
+
+    Results read through it arrive as Arrow record batches over gRPC instead
+    of JSON pages from the REST API.
+    """
+    try:
+        from google.cloud import bigquery_storage
+    except ImportError:
+        return None
+    credentials, _ = google.auth.default(scopes=bigquery.Client.SCOPE)
+    return bigquery_storage.BigQueryReadClient(credentials=credentials)
+
+def time_partitioning(partition_field):
+    if partition_field is None:
+        return None
+    return bigquery.TimePartitioning(type_=bigquery.TimePartitioningType.DAY, field=partition_field)
+
+def _scalar_type(value):
+    # bool must be checked before int, and datetime before date. The numbers
+    # ABCs also cover numpy scalars such as np.int64 from DataFrame cells
+    if isinstance(value, (bool, np.bool_)):
+        return "BOOL"
+    if isinstance(value, numbers.Integral):
+        return "INT64"
+    if isinstance(value, numbers.Real):
+        return "FLOAT64"
+    if isinstance(value, datetime):
+        return "TIMESTAMP"
+    if isinstance(value, date):
+        return "DATE"
+    return "STRING"
+
+def query_parameters(params):
+    return [
+        bigquery.ScalarQueryParameter(name, _scalar_type(value), value.item() if isinstance(value, np.generic) else value)
+        for name, value in (params or {}).items()
+    ]
+
+class BigQueryStorage(StorageBackend):
+    def __init__(self, project_id, dataset_id, client=None):
+        self.project_id = project_id
+        self.dataset_id = dataset_id
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_bigquery_client(self.project_id)
+        return self._client
+
+    def table_id(self, table_name):
+        return f"{self.project_id}.{self.dataset_id}.{table_name}"
+
+    def table_ref(self, table_name):
+        return f"`{self.table_id(table_name)}`"
+
+    def _result(self, sql, params):
+        job_config = bigquery.QueryJobConfig(query_parameters=query_parameters(params))
+        return self.client.query(sql, job_config=job_config).result()
+
+    def _list_rows(self, table_name, columns):
+        # Reading the table directly skips the query job entirely
+        table = self.client.get_table(self.table_id(table_name))
+        by_name = {field.name: field for field in table.schema}
+        fields = [by_name[name] for name in columns] if columns else None
+        return self.client.list_rows(table, selected_fields=fields)
+
+    def query(self, sql, params=None):
+        return self._result(sql, params).to_dataframe(bqstorage_client=get_bqstorage_client())
+
+    def query_arrow(self, sql, params=None):
+        return self._result(sql, params).to_arrow(bqstorage_client=get_bqstorage_client())
+
+    def iter_batches(self, sql, params=None):
+        yield from self._result(sql, params).to_arrow_iterable(bqstorage_client=get_bqstorage_client())
+
+    def read_table_arrow(self, table_name, columns=None):
+        return self._list_rows(table_name, columns).to_arrow(bqstorage_client=get_bqstorage_client())
+
+    def iter_table_batches(self, table_name, columns=None):
+        yield from self._list_rows(table_name, columns).to_arrow_iterable(bqstorage_client=get_bqstorage_client())
+
+    def drop_if_partitioned_differently(self, table_name, partition_field):
+        # Load and query jobs cannot change an existing table's partitioning,
+        # so tables created before it was set have to be recreated once
+        try:
+            table = self.client.get_table(self.table_id(table_name))
+        except NotFound:
+            return False
+        current = table.time_partitioning.field if table.time_partitioning is not None else None
+        if current == partition_field:
+            return False
+        self.client.delete_table(table, not_found_ok=True)
+        print(f"Dropped {table_name} to recreate it with partitioning on {partition_field}.")
+        return True
+
+    def _prepare_write(self, table_name, mode, partition_field):
+        # An overwrite replaces every row anyway, so it may drop a table whose
+        # partitioning no longer matches instead of failing on it
+        if mode == OVERWRITE and partition_field is not None:
+            self.drop_if_partitioned_differently(table_name, partition_field)
+
+    def write_table(self, df, table_name, mode=OVERWRITE, schema=None, partition_field=None):
+        self._prepare_write(table_name, mode, partition_field)
+        job_config = bigquery.LoadJobConfig(
+            schema=schema,
+            write_disposition=_WRITE_DISPOSITIONS[mode],
+            time_partitioning=time_partitioning(partition_field),
+        )
+        job = self.client.load_table_from_dataframe(
+            df, self.table_id(table_name), job_config=job_config
+        )
+        job.result()
+        return job.output_rows
+
+    def materialize(self, sql, table_name, mode=OVERWRITE, params=None, partition_field=None):
+        self._prepare_write(table_name, mode, partition_field)
+        job_config = bigquery.QueryJobConfig(
+            destination=self.table_id(table_name),
+            write_disposition=_WRITE_DISPOSITIONS[mode],
+            query_parameters=query_parameters(params),
+            time_partitioning=time_partitioning(partition_field),
+        )
+        self.client.query(sql, job_config=job_config).result()
+
+    def upsert_row(self, table_name, key_column, row, schema=None):
+        # A single MERGE statement, so concurrent upserts never lose each other's rows
+        columns = list(row)
+        source = ', '.join(f"@{column} AS {column}" for column in columns)
+        updates = ', '.join(f"{column} = S.{column}" for column in columns if column != key_column)
+        sql = f"""
+            MERGE {self.table_ref(table_name)} T
+            USING (SELECT {source}) S
+            ON T.{key_column} = S.{key_column}
+            WHEN MATCHED THEN
+              UPDATE SET {updates}
+            WHEN NOT MATCHED THEN
+              INSERT ({', '.join(columns)})
+              VALUES ({', '.join(f"S.{column}" for column in columns)})
+        """
+        self._result(sql, row)
+
+    def table_exists(self, table_name):
+        try:
+            self.client.get_table(self.table_id(table_name))
+            return True
+        except NotFound:
+            return False
+
+    def create_table(self, table_name, schema, partition_field=None):
+        if self.table_exists(table_name):
+            return False
+        table = bigquery.Table(self.table_id(table_name), schema=schema)
+        table.time_partitioning = time_partitioning(partition_field)
+        self.client.create_table(table)
+        return True
+
+    def ensure_dataset(self):
+        dataset_ref = bigquery.DatasetReference(self.project_id, self.dataset_id)
+        try:
+            self.client.get_dataset(dataset_ref)
+        except NotFound:
+            self.client.create_dataset(dataset_ref)
+            print(f"Dataset {self.dataset_id} created.")
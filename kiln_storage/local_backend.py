@@ -0,0 +1,142 @@
+import os
+import re
+import shutil
+import uuid
+from threading import RLock
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from .base import OVERWRITE, StorageBackend
+
+_ARROW_TYPES = {
+    "STRING": pa.string(),
+    "FLOAT": pa.float64(),
+    "FLOAT64": pa.float64(),
+    "INTEGER": pa.int64(),
+    "INT64": pa.int64(),
+    "BOOLEAN": pa.bool_(),
+    "BOOL": pa.bool_(),
+    # BigQuery returns TIMESTAMP columns as tz-aware UTC, so store them that way
+    "TIMESTAMP": pa.timestamp("us", tz="UTC"),
+    "DATE": pa.date32(),
+}
+
+# Rows per record batch when streaming query results
+LOCAL_BATCH_ROWS = 100_000
+# Row group size for partitioned tables: about one day of one-minute samples.
+# DuckDB skips row groups whose min/max statistics miss a filter, which stands
+# in for BigQuery's partition pruning.
+LOCAL_PARTITION_ROWS = 1440
+
+_PARAM_PATTERN = re.compile(r"@(\w+)")
+
+def arrow_schema(schema):
+    return pa.schema([
+        pa.field(field.name, _ARROW_TYPES[field.field_type.upper()], nullable=field.mode != "REQUIRED")
+        for field in schema
+    ])
+
+class LocalStorage(StorageBackend):
+    """
+    Stores each table as a directory of Parquet part files under `root_dir`
+    and runs SQL through an embedded DuckDB engine.
+
+    Overwrites replace all parts of a table and appends add a new part, so
+    appends never rewrite existing data.
+    """
+
+    def __init__(self, root_dir):
+        self.root_dir = os.path.abspath(root_dir)
+        # Reentrant so upsert_row can hold it across its read and rewrite
+        self._write_lock = RLock()
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def _table_dir(self, table_name):
+        return os.path.join(self.root_dir, table_name)
+
+    def _connect(self):
+        import duckdb
+
+        con = duckdb.connect()
+        for table_name in os.listdir(self.root_dir):
+            table_dir = self._table_dir(table_name)
+            # Dotted names are overwrites still being staged or swapped out
+            if '.' not in table_name and os.path.isdir(table_dir) and os.listdir(table_dir):
+                pattern = os.path.join(table_dir, "*.parquet").replace("'", "''")
+                con.execute(f"CREATE VIEW {self.table_ref(table_name)} AS SELECT * FROM read_parquet('{pattern}')")
+        return con
+
+    def table_ref(self, table_name):
+        return f'"{table_name}"'
+
+    def _execute(self, sql, params):
+        con = self._connect()
+        # DuckDB binds named parameters as $name rather than BigQuery's @name
+        return con.execute(_PARAM_PATTERN.sub(r"$\1", sql), params or {})
+
+    def query(self, sql, params=None):
+        return self._execute(sql, params).df()
+
+    def query_arrow(self, sql, params=None):
+        return self._execute(sql, params).fetch_arrow_table()
+
+    def iter_batches(self, sql, params=None):
+        # The reader keeps its connection alive until it is exhausted
+        yield from self._execute(sql, params).fetch_record_batch(LOCAL_BATCH_ROWS)
+
+    def _write_arrow(self, table, table_name, mode, partition_field=None):
+        table_dir = self._table_dir(table_name)
+        write_options = {}
+        if partition_field is not None:
+            table = table.sort_by(partition_field)
+            write_options["row_group_size"] = LOCAL_PARTITION_ROWS
+        with self._write_lock:
+            if mode == OVERWRITE:
+                # Stage the new contents beside the table and swap directories,
+                # so readers see either the old or the new table, never neither
+                staging_dir = f"{table_dir}.staging-{uuid.uuid4().hex}"
+                os.makedirs(staging_dir)
+                pq.write_table(table, os.path.join(staging_dir, "part-00000.parquet"), **write_options)
+                retired_dir = f"{table_dir}.retired-{uuid.uuid4().hex}"
+                if os.path.isdir(table_dir):
+                    os.rename(table_dir, retired_dir)
+                os.rename(staging_dir, table_dir)
+                shutil.rmtree(retired_dir, ignore_errors=True)
+            else:
+                os.makedirs(table_dir, exist_ok=True)
+                part = len(os.listdir(table_dir))
+                pq.write_table(table, os.path.join(table_dir, f"part-{part:05d}.parquet"), **write_options)
+        return table.num_rows
+
+    def write_table(self, df, table_name, mode=OVERWRITE, schema=None, partition_field=None):
+        if schema is not None:
+            table = pa.Table.from_pandas(df, schema=arrow_schema(schema), preserve_index=False)
+        else:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        return self._write_arrow(table, table_name, mode, partition_field)
+
+    def materialize(self, sql, table_name, mode=OVERWRITE, params=None, partition_field=None):
+        # The result stays in Arrow end to end and never becomes Python objects
+        self._write_arrow(self._execute(sql, params).fetch_arrow_table(), table_name, mode, partition_field)
+
+    def upsert_row(self, table_name, key_column, row, schema=None):
+        # There is no DML on Parquet parts, so rewrite the table under the
+        # write lock; meant for small bookkeeping tables
+        with self._write_lock:
+            if self.table_exists(table_name):
+                df = self.read_table(table_name)
+                df = df[df[key_column] != row[key_column]]
+            else:
+                df = pd.DataFrame(columns=list(row))
+            df = pd.concat([df, pd.DataFrame([row])], ignore_index=True) if len(df) else pd.DataFrame([row])
+            self.write_table(df, table_name, mode=OVERWRITE, schema=schema)
+
+    def table_exists(self, table_name):
+        table_dir = self._table_dir(table_name)
+        return os.path.isdir(table_dir) and bool(os.listdir(table_dir))
+
+    def create_table(self, table_name, schema, partition_field=None):
+        if self.table_exists(table_name):
+            return False
+        self._write_arrow(arrow_schema(schema).empty_table(), table_name, OVERWRITE)
+        return True
@@ -0,0 +1,21 @@
+"""
+Layout of the multi-resolution sensor rollup tables.
+
+The analysis pipeline writes them, data_simulation creates them and the
+dashboards read them, so all three take these definitions from here.
+"""
+import pandas as pd
+
+# Resolution name -> pandas frequency, finest first
+ROLLUP_RESOLUTIONS = {"1m": "1min", "5m": "5min", "1h": "1h", "1d": "1D"}
+# Bucket width per resolution, coarsest first
+ROLLUP_STEPS = [(resolution, pd.Timedelta(freq)) for resolution, freq in reversed(ROLLUP_RESOLUTIONS.items())]
+ROLLUP_SENSORS = [
+    'actual_fcao', 'raw_material_feed_rate', 'kiln_temperature', 'fuel_consumption',
+    'vibration', 'motor_current_draw', 'pressure', 'oxygen', 'clinker_production',
+    'energy_consumption_kwh', 'specific_energy_consumption',
+]
+ROLLUP_STATS = ['min', 'max', 'mean', 'count']
+
+def rollup_table_id(resolution):
+    return f"kiln_rollup_{resolution}"
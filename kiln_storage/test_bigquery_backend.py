@@ -0,0 +1,44 @@
+import os
+import sys
+from unittest import mock
+
+import pandas as pd
+import pytest
+
+bigquery = pytest.importorskip("google.cloud.bigquery")
+from google.api_core.exceptions import NotFound
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from kiln_storage.base import APPEND, OVERWRITE
+from kiln_storage.bigquery_backend import BigQueryStorage, time_partitioning
+
+def _storage(existing_partitioning):
+    client = mock.Mock()
+    if existing_partitioning is NotFound:
+        client.get_table.side_effect = NotFound("missing")
+    else:
+        client.get_table.return_value = mock.Mock(time_partitioning=existing_partitioning)
+    return BigQueryStorage("project", "dataset", client=client)
+
+def test_overwrite_recreates_an_unpartitioned_table():
+    storage = _storage(existing_partitioning=None)
+
+    storage.write_table(pd.DataFrame({"timestamp": []}), "alerts", mode=OVERWRITE, partition_field="timestamp")
+
+    storage.client.delete_table.assert_called_once()
+    job_config = storage.client.load_table_from_dataframe.call_args.kwargs["job_config"]
+    assert job_config.time_partitioning.field == "timestamp"
+
+@pytest.mark.parametrize("existing_partitioning, mode", [
+    (time_partitioning("timestamp"), OVERWRITE),  # Already partitioned as requested
+    (NotFound, OVERWRITE),  # Created by the load job itself
+    (None, APPEND),  # Appends keep the rows, so the load job reports the mismatch
+])
+def test_other_writes_leave_the_table_in_place(existing_partitioning, mode):
+    storage = _storage(existing_partitioning)
+
+    storage.write_table(pd.DataFrame({"timestamp": []}), "alerts", mode=mode, partition_field="timestamp")
+
+    storage.client.delete_table.assert_not_called()
@@ -1,6 +1,12 @@
-from google.cloud import bigquery
 import pandas as pd
 from sklearn.preprocessing import StandardScaler
+import os
+import sys
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from kiln_storage import get_storage
 
 # --- Configuration --- #
 PROJECT_ID = "operations-472416" # Replace with your actual GCP Project ID
@@ -9,13 +15,13 @@ TABLE_ID = "simulated_kiln_data"
 PROCESSED_DATA_PATH = "model_training/processed_kiln_data.csv"
 
 def preprocess_data():
-    client = bigquery.Client(project=PROJECT_ID)
+    storage = get_storage(PROJECT_ID, DATASET_ID)
     query = f"""
         SELECT *
-        FROM `{PROJECT_ID}.{DATASET_ID}.{TABLE_ID}`
+        FROM {storage.table_ref(TABLE_ID)}
         ORDER BY timestamp
     """
-    df = client.query(query).to_dataframe()
+    df = storage.query(query)
 
     print(f"Original data shape: {df.shape}")
     print(f"Columns: {df.columns.tolist()}")
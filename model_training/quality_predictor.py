@@ -1,9 +1,14 @@
 import pandas as pd
-from google.cloud import bigquery
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor
 import joblib
 import os
+import sys
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from kiln_storage import get_storage
 
 # --- Configuration --- #
 PROJECT_ID = os.getenv("GCP_PROJECT_ID", "operations-472416")
@@ -16,9 +21,9 @@ def train_and_save_model():
     """
     Trains a model to predict clinker quality and saves it to a file.
     """
-    client = bigquery.Client(project=PROJECT_ID)
+    storage = get_storage(PROJECT_ID, DATASET_ID)
 
-    # Load data from BigQuery
+    # Load data from storage
     query = f"""
         SELECT 
             actual_fcao, 
@@ -29,9 +34,9 @@ def train_and_save_model():
             motor_current_draw, 
             pressure, 
             oxygen
-        FROM `{PROJECT_ID}.{DATASET_ID}.{TABLE_ID}`
+        FROM {storage.table_ref(TABLE_ID)}
     """
-    df = client.query(query).to_dataframe()
+    df = storage.query(query)
 
     # Prepare data for training
     X = df.drop("actual_fcao", axis=1)
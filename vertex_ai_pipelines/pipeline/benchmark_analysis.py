@@ -0,0 +1,70 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from pipeline import ANOMALY_THRESHOLD_STD, METRICS_TO_ANALYZE, ROLLING_WINDOW_SIZE, build_analysis_frame
+
+def make_sensor_frame(num_days, seed=42):
+    """
+    Builds a minute-resolution frame with the columns run_analysis_pipeline reads.
+    """
+    rng = np.random.default_rng(seed)
+    num_rows = num_days * 24 * 60
+    df = pd.DataFrame({
+        'timestamp': pd.date_range('2023-01-01', periods=num_rows, freq='min'),
+        'kiln_temperature': rng.normal(1450, 5, num_rows),
+        'fuel_consumption': rng.normal(80, 2, num_rows),
+        'vibration': rng.normal(0.5, 0.05, num_rows),
+        'pressure': rng.normal(50, 2, num_rows),
+        'oxygen': rng.normal(2.5, 0.05, num_rows),
+        'target_kiln_temperature': 1450.0,
+        'target_fuel_consumption': 80.0,
+    })
+    df.loc[::997, 'kiln_temperature'] -= 100  # A few spikes so the anomaly flags are exercised
+    return df
+
+def iterrows_analysis_frame(df):
+    """
+    The original per-row implementation, kept as the reference for the benchmark.
+    """
+    df = df.copy()
+    analysis_results = []
+    for metric in METRICS_TO_ANALYZE:
+        df[f'{metric}_rolling_mean'] = df[metric].rolling(window=ROLLING_WINDOW_SIZE).mean()
+        df[f'{metric}_rolling_std'] = df[metric].rolling(window=ROLLING_WINDOW_SIZE).std()
+        df['is_anomaly'] = (
+            np.abs(df[metric] - df[f'{metric}_rolling_mean']) >
+            df[f'{metric}_rolling_std'] * ANOMALY_THRESHOLD_STD
+        )
+        for _, row in df.iterrows():
+            analysis_results.append({
+                'timestamp': row['timestamp'],
+                'metric_name': metric,
+                'value': row[metric],
+                'target': row.get(f'target_{metric}'),
+                'deviation': row[metric] - row.get(f'target_{metric}', row[metric]),
+                'is_anomaly': bool(row['is_anomaly'])
+            })
+    return pd.DataFrame(analysis_results)
+
+def run_benchmark(days_list):
+    print(f"{'days':>6} {'output rows':>12} {'iterrows (s)':>13} {'vectorized (s)':>15} {'speedup':>9}")
+    for num_days in days_list:
+        df = make_sensor_frame(num_days)
+
+        start = time.perf_counter()
+        expected = iterrows_analysis_frame(df)
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = build_analysis_frame(df)
+        vec_time = time.perf_counter() - start
+
+        pd.testing.assert_frame_equal(actual, expected)
+        print(f"{num_days:>6} {len(actual):>12} {loop_time:>13.2f} {vec_time:>15.3f} {loop_time / vec_time:>8.0f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the variance analysis step of run_analysis_pipeline.")
+    parser.add_argument("--days", type=int, nargs="+", default=[1, 7])
+    args = parser.parse_args()
+    run_benchmark(args.days)
@@ -1,7 +1,16 @@
 from google.cloud import bigquery
+from datetime import datetime, timezone
+import argparse
 import pandas as pd
 import numpy as np
 import os
+import sys
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from kiln_storage import APPEND, OVERWRITE, get_storage
+from kiln_storage.rollups import ROLLUP_RESOLUTIONS, ROLLUP_SENSORS, ROLLUP_STATS, rollup_table_id
 
 # --- Configuration --- #
 PROJECT_ID = os.getenv("GCP_PROJECT_ID", "operations-472416")
@@ -9,80 +18,270 @@ DATASET_ID = "kiln_data_dataset"
 SOURCE_TABLE_ID = "simulated_kiln_data"
 MODEL_PREDICTIONS_TABLE_ID = "model_predictions"
 VARIANCE_ANALYSIS_TABLE_ID = "variance_analysis"
+WATERMARK_TABLE_ID = "pipeline_watermarks"
+PARTITION_FIELD = "timestamp"  # Result tables are day-partitioned for time-range reads
 
 # --- Analysis Parameters ---
 ROLLING_WINDOW_SIZE = 60  # For calculating rolling stats
 ANOMALY_THRESHOLD_STD = 3    # Number of std deviations for anomaly detection
+METRICS_TO_ANALYZE = ['kiln_temperature', 'fuel_consumption', 'vibration', 'pressure', 'oxygen']
+
+SAMPLE_INTERVAL = pd.Timedelta(minutes=1)  # Source cadence; a bucket is complete once its last minute has landed
+# How far back the incremental run looks for its rolling-window rows; twice
+# the window so a few missing samples still leave a full lookback
+LOOKBACK_SPAN = SAMPLE_INTERVAL * ROLLING_WINDOW_SIZE * 2
+
+def build_analysis_frame(df, metrics=METRICS_TO_ANALYZE):
+    """
+    Builds the long-format variance analysis table from the wide sensor frame.
+
+    Rolling mean/std, anomaly flags, targets and deviations are computed as
+    whole columns for every metric at once, then unpivoted metric-major (all
+    rows for the first metric, then the next, ...) into one row per
+    (timestamp, metric). Metrics without a `target_<metric>` column get a null
+    target and zero deviation (null where the reading itself is missing).
+    """
+    values = df[metrics].astype(float)
+    rolling = values.rolling(window=ROLLING_WINDOW_SIZE)
+    is_anomaly = (values - rolling.mean()).abs() > rolling.std() * ANOMALY_THRESHOLD_STD
+
+    targets = pd.DataFrame(
+        {metric: df[f'target_{metric}'] if f'target_{metric}' in df.columns else np.nan for metric in metrics},
+        index=df.index,
+    ).astype(float)
+    deviation = values - targets
+    for metric in metrics:
+        if f'target_{metric}' not in df.columns:
+            # value - value, as the row-wise version had it, so a missing reading stays null
+            deviation[metric] = values[metric] - values[metric]
+
+    # Column-major ravel is the same unpivot as melt(value_vars=metrics)
+    num_rows = len(df)
+    return pd.DataFrame({
+        'timestamp': np.tile(df['timestamp'].to_numpy(), len(metrics)),
+        'metric_name': np.repeat(metrics, num_rows),
+        'value': values.to_numpy().ravel(order='F'),
+        'target': targets.to_numpy().ravel(order='F'),
+        'deviation': deviation.to_numpy().ravel(order='F'),
+        'is_anomaly': is_anomaly.to_numpy().ravel(order='F'),
+    })
+
+def simulate_predictions(df):
+    """
+    Returns mock fCaO predictions for every row of `df`.
+    """
+    predictions_df = df[['timestamp']].copy()
+    predictions_df['predicted_fcao'] = df['actual_fcao'] + np.random.normal(0, 0.1, size=len(df))
+    predictions_df['prediction_confidence'] = np.random.uniform(0.8, 0.99, size=len(df))
+    return predictions_df
+
+def load_results(storage, df, table_name, mode):
+    output_rows = storage.write_table(df, table_name, mode=mode, partition_field=PARTITION_FIELD)
+    print(f"Loaded {output_rows} rows into {table_name}.")
+
+# --- Watermarks --- #
+watermark_schema = [
+    bigquery.SchemaField("table_name", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("high_water_mark", "TIMESTAMP", mode="REQUIRED"),
+    bigquery.SchemaField("updated_at", "TIMESTAMP", mode="REQUIRED"),
+]
+
+def ensure_watermark_table(storage):
+    storage.create_table(WATERMARK_TABLE_ID, watermark_schema)
+
+def get_watermark(storage, table_name):
+    """
+    Returns the latest source timestamp already written to `table_name`, or None.
+    """
+    query = f"SELECT high_water_mark FROM {storage.table_ref(WATERMARK_TABLE_ID)} WHERE table_name = @table_name"
+    df = storage.query(query, {"table_name": table_name})
+    return df['high_water_mark'].iloc[0].to_pydatetime() if len(df) else None
+
+def set_watermark(storage, table_name, high_water_mark):
+    storage.upsert_row(WATERMARK_TABLE_ID, "table_name", {
+        "table_name": table_name,
+        "high_water_mark": pd.Timestamp(high_water_mark).to_pydatetime(),
+        "updated_at": datetime.now(timezone.utc),
+    }, schema=watermark_schema)
+
+def load_rows_since(storage, watermark):
+    """
+    Loads source rows newer than `watermark`, plus the ROLLING_WINDOW_SIZE - 1
+    rows before it so the first new rows get full rolling windows.
+
+    The lookback only searches the LOOKBACK_SPAN before the watermark, so the
+    scan covers the recent partitions rather than the table's whole history.
+    """
+    source_table = storage.table_ref(SOURCE_TABLE_ID)
+    query = f"""
+        WITH lookback AS (
+          SELECT timestamp
+          FROM {source_table}
+          WHERE timestamp <= @watermark AND timestamp > @lookback_start
+          ORDER BY timestamp DESC
+          LIMIT {ROLLING_WINDOW_SIZE - 1}
+        )
+        SELECT *
+        FROM {source_table}
+        WHERE timestamp >= (SELECT IFNULL(MIN(timestamp), @watermark) FROM lookback)
+        ORDER BY timestamp
+    """
+    lookback_start = (pd.Timestamp(watermark) - LOOKBACK_SPAN).to_pydatetime()
+    return storage.query(query, {"watermark": watermark, "lookback_start": lookback_start})
+
+# --- Rollups --- #
+def build_rollup(df, freq, until):
+    """
+    Aggregates the sensors in `df` into `freq` buckets labelled by their start,
+    with min/max/mean/count per sensor. Only buckets that end at or before
+    `until` are returned, so a partially filled bucket is never written.
+    """
+    frame = df.set_index('timestamp')[ROLLUP_SENSORS]
+    rollup = frame.resample(freq).agg(ROLLUP_STATS)
+    rollup.columns = [f"{sensor}_{stat}" for sensor, stat in rollup.columns]
+    complete = rollup.index + pd.Timedelta(freq) <= until
+    has_rows = rollup[[f"{sensor}_count" for sensor in ROLLUP_SENSORS]].sum(axis=1) > 0
+    return rollup[complete & has_rows].reset_index()
+
+def write_rollups(storage, df, mode, watermarks=None):
+    """
+    Writes every rollup resolution for the source rows in `df` and advances
+    each rollup's watermark to the end of its last complete bucket.
+
+    For rollup tables the watermark is that exclusive bucket end rather than a
+    source timestamp, so the next run starts exactly at the next bucket.
+    `watermarks` maps resolution to the bucket to start from (default: all of `df`).
+    """
+    if not len(df):
+        return
+    until = df['timestamp'].max() + SAMPLE_INTERVAL
+    for resolution, freq in ROLLUP_RESOLUTIONS.items():
+        rows = df
+        if watermarks is not None:
+            rows = df[df['timestamp'] >= watermarks[resolution]]
+        rollup = build_rollup(rows, freq, until)
+        table_name = rollup_table_id(resolution)
+        if len(rollup) or mode == OVERWRITE:
+            load_results(storage, rollup, table_name, mode)
+        set_watermark(storage, table_name, until.floor(freq))
+
+def load_source_since(storage, since, columns):
+    query = f"""
+        SELECT {', '.join(columns)}
+        FROM {storage.table_ref(SOURCE_TABLE_ID)}
+        WHERE timestamp >= @since
+        ORDER BY timestamp
+    """
+    return storage.query(query, {"since": since})
+
+def update_rollups(storage):
+    """
+    Appends the rollup buckets completed since the last run, or rebuilds every
+    rollup table when one of them has no watermark yet.
+    """
+    watermarks = {
+        resolution: get_watermark(storage, rollup_table_id(resolution))
+        for resolution in ROLLUP_RESOLUTIONS
+    }
+    columns = ['timestamp'] + ROLLUP_SENSORS
+    if any(watermark is None for watermark in watermarks.values()):
+        print("Rebuilding rollup tables...")
+        write_rollups(storage, storage.read_table(SOURCE_TABLE_ID, columns), OVERWRITE)
+        return
+
+    df = load_source_since(storage, min(watermarks.values()), columns)
+    watermarks = {resolution: pd.Timestamp(watermark) for resolution, watermark in watermarks.items()}
+    write_rollups(storage, df, APPEND, watermarks)
 
 def run_analysis_pipeline():
     """
     Runs the data analysis pipeline.
     """
-    client = bigquery.Client(project=PROJECT_ID)
+    storage = get_storage(PROJECT_ID, DATASET_ID)
 
-    # 1. Load data from BigQuery
-    print("Loading data from BigQuery...")
-    query = f"SELECT * FROM `{PROJECT_ID}.{DATASET_ID}.{SOURCE_TABLE_ID}`"
-    df = client.query(query).to_dataframe()
+    # 1. Load data from storage
+    print("Loading source data...")
+    # Table reads come back in no particular order (the Storage Read API
+    # streams in parallel), and the rolling windows depend on it
+    df = storage.read_table(SOURCE_TABLE_ID).sort_values('timestamp', ignore_index=True)
     print(f"Loaded {len(df)} rows.")
 
     # 2. Simulate model predictions
     print("Simulating model predictions...")
-    df['predicted_fcao'] = df['actual_fcao'] + np.random.normal(0, 0.1, size=len(df))
-    df['prediction_confidence'] = np.random.uniform(0.8, 0.99, size=len(df))
-    
-    predictions_df = df[['timestamp', 'predicted_fcao', 'prediction_confidence']]
+    predictions_df = simulate_predictions(df)
     
-    # Load predictions to BigQuery
-    predictions_table_id = f"{PROJECT_ID}.{DATASET_ID}.{MODEL_PREDICTIONS_TABLE_ID}"
-    job_config = bigquery.LoadJobConfig(
-        write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
-    )
-    job = client.load_table_from_dataframe(
-        predictions_df, predictions_table_id, job_config=job_config
-    )
-    job.result()
-    print(f"Loaded {job.output_rows} rows into {predictions_table_id}.")
+    # Store predictions
+    load_results(storage, predictions_df, MODEL_PREDICTIONS_TABLE_ID, OVERWRITE)
 
     # 3. Variance and Anomaly Analysis
     print("Performing variance and anomaly analysis...")
-    analysis_results = []
-    metrics_to_analyze = ['kiln_temperature', 'fuel_consumption', 'vibration', 'pressure', 'oxygen']
-
-    for metric in metrics_to_analyze:
-        df[f'{metric}_rolling_mean'] = df[metric].rolling(window=ROLLING_WINDOW_SIZE).mean()
-        df[f'{metric}_rolling_std'] = df[metric].rolling(window=ROLLING_WINDOW_SIZE).std()
-        
-        # Detect anomalies
-        df['is_anomaly'] = (
-            np.abs(df[metric] - df[f'{metric}_rolling_mean']) > 
-            df[f'{metric}_rolling_std'] * ANOMALY_THRESHOLD_STD
-        )
-        
-        # Prepare results for BigQuery
-        for _, row in df.iterrows():
-            analysis_results.append({
-                'timestamp': row['timestamp'],
-                'metric_name': metric,
-                'value': row[metric],
-                'target': row.get(f'target_{metric}'), # Get target if it exists
-                'deviation': row[metric] - row.get(f'target_{metric}', row[metric]),
-                'is_anomaly': bool(row['is_anomaly'])
-            })
-
-    analysis_df = pd.DataFrame(analysis_results)
-
-    # 4. Store analysis results in BigQuery
-    print("Storing analysis results in BigQuery...")
-    analysis_table_id = f"{PROJECT_ID}.{DATASET_ID}.{VARIANCE_ANALYSIS_TABLE_ID}"
-    job_config = bigquery.LoadJobConfig(
-        write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
-    )
-    job = client.load_table_from_dataframe(
-        analysis_df, analysis_table_id, job_config=job_config
-    )
-    job.result()
-    print(f"Loaded {job.output_rows} rows into {analysis_table_id}.")
+    analysis_df = build_analysis_frame(df)
+
+    # 4. Store analysis results
+    print("Storing analysis results...")
+    load_results(storage, analysis_df, VARIANCE_ANALYSIS_TABLE_ID, OVERWRITE)
+
+    # 5. Record how far the outputs are up to date for incremental runs
+    if len(df):
+        ensure_watermark_table(storage)
+        high_water_mark = df['timestamp'].max().to_pydatetime()
+        set_watermark(storage, MODEL_PREDICTIONS_TABLE_ID, high_water_mark)
+        set_watermark(storage, VARIANCE_ANALYSIS_TABLE_ID, high_water_mark)
+
+    # 6. Rebuild the multi-resolution rollups the dashboards read
+    print("Building rollup tables...")
+    write_rollups(storage, df, OVERWRITE)
+
+def run_incremental_analysis_pipeline():
+    """
+    Runs the analysis pipeline over source rows that arrived since the last run.
+
+    Each output table keeps its own high-water mark, advanced only after its
+    rows are appended, so an interrupted run resumes without double-writing the
+    table that already succeeded. Falls back to a full run when no watermark
+    exists yet.
+    """
+    storage = get_storage(PROJECT_ID, DATASET_ID)
+    ensure_watermark_table(storage)
+
+    predictions_watermark = get_watermark(storage, MODEL_PREDICTIONS_TABLE_ID)
+    analysis_watermark = get_watermark(storage, VARIANCE_ANALYSIS_TABLE_ID)
+    if predictions_watermark is None or analysis_watermark is None:
+        print("No watermark found, running a full refresh...")
+        run_analysis_pipeline()
+        return
+
+    # Rollups track their own bucket-aligned watermarks
+    update_rollups(storage)
+
+    # 1. Load only new rows plus the rolling-window lookback
+    watermark = min(predictions_watermark, analysis_watermark)
+    print(f"Loading rows newer than {watermark}...")
+    df = load_rows_since(storage, watermark)
+    new_rows = df['timestamp'] > watermark
+    print(f"Loaded {new_rows.sum()} new rows ({len(df)} including lookback).")
+    if not new_rows.any():
+        return
+    high_water_mark = df['timestamp'].max().to_pydatetime()
+
+    # 2. Append predictions for rows past the predictions watermark
+    pending = df[df['timestamp'] > predictions_watermark]
+    if len(pending):
+        load_results(storage, simulate_predictions(pending), MODEL_PREDICTIONS_TABLE_ID, APPEND)
+        set_watermark(storage, MODEL_PREDICTIONS_TABLE_ID, high_water_mark)
+
+    # 3. Append analysis rows past the analysis watermark
+    analysis_df = build_analysis_frame(df)
+    analysis_df = analysis_df[analysis_df['timestamp'] > analysis_watermark]
+    if len(analysis_df):
+        load_results(storage, analysis_df, VARIANCE_ANALYSIS_TABLE_ID, APPEND)
+        set_watermark(storage, VARIANCE_ANALYSIS_TABLE_ID, high_water_mark)
 
 if __name__ == "__main__":
-    run_analysis_pipeline()
+    parser = argparse.ArgumentParser(description="Run the kiln data analysis pipeline.")
+    parser.add_argument("--incremental", action="store_true", help="Only process rows newer than the stored watermark.")
+    args = parser.parse_args()
+    if args.incremental:
+        run_incremental_analysis_pipeline()
+    else:
+        run_analysis_pipeline()
@@ -0,0 +1,112 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("duckdb")
+pytest.importorskip("google.cloud.bigquery")
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from kiln_storage.local_backend import LocalStorage
+from kiln_storage.rollups import ROLLUP_RESOLUTIONS, ROLLUP_SENSORS, rollup_table_id
+from vertex_ai_pipelines.pipeline import pipeline
+from benchmark_analysis import iterrows_analysis_frame, make_sensor_frame
+
+def make_source(start, minutes, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({"timestamp": pd.date_range(start, periods=minutes, freq="min", tz="UTC")})
+    for sensor in ROLLUP_SENSORS:
+        df[sensor] = rng.normal(100, 5, minutes)
+    return df
+
+def test_analysis_frame_matches_the_row_wise_loop():
+    df = make_sensor_frame(num_days=1).iloc[:200].copy()
+    # Missing readings blank the rolling stats for a window after them
+    df.loc[[0, 75, 76], 'pressure'] = np.nan
+    df.loc[130, 'oxygen'] = np.nan
+    df.loc[[30, 59, 60, 61], 'kiln_temperature'] -= 100  # Spikes on either side of the first full window
+
+    actual = pipeline.build_analysis_frame(df)
+    expected = iterrows_analysis_frame(df)
+
+    pd.testing.assert_frame_equal(actual, expected)
+    assert actual['value'].isna().sum() == 4
+    # Nothing can be flagged before the first full window
+    first_window = actual.groupby('metric_name')['is_anomaly'].head(pipeline.ROLLING_WINDOW_SIZE - 1)
+    assert not first_window.any()
+    assert actual['is_anomaly'].any()
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    pipeline.ensure_watermark_table(storage)
+    return storage
+
+def test_build_rollup_aggregates_complete_buckets_only():
+    df = make_source("2023-01-01", 12)
+    until = df['timestamp'].max() + pipeline.SAMPLE_INTERVAL
+
+    rollup = pipeline.build_rollup(df, "5min", until)
+
+    # 12 minutes fill two 5-minute buckets; the third holds only 2 samples
+    assert list(rollup['timestamp']) == list(df['timestamp'].iloc[[0, 5]])
+    first = df['kiln_temperature'].iloc[:5]
+    row = rollup.iloc[0]
+    assert row['kiln_temperature_min'] == first.min()
+    assert row['kiln_temperature_max'] == first.max()
+    assert row['kiln_temperature_mean'] == pytest.approx(first.mean())
+    assert row['kiln_temperature_count'] == 5
+
+def test_update_rollups_appends_like_a_rebuild(storage):
+    source = make_source("2023-01-01", 2 * 1440 + 90)
+    first, rest = source.iloc[:1440 + 37], source.iloc[1440 + 37:]
+    storage.write_table(first, pipeline.SOURCE_TABLE_ID, partition_field="timestamp")
+    pipeline.update_rollups(storage)
+    storage.write_table(rest, pipeline.SOURCE_TABLE_ID, mode=pipeline.APPEND, partition_field="timestamp")
+    pipeline.update_rollups(storage)
+
+    until = source['timestamp'].max() + pipeline.SAMPLE_INTERVAL
+    for resolution, freq in ROLLUP_RESOLUTIONS.items():
+        table_name = rollup_table_id(resolution)
+        incremental = storage.read_table(table_name).sort_values('timestamp', ignore_index=True)
+        expected = pipeline.build_rollup(source, freq, until)
+        pd.testing.assert_frame_equal(incremental, expected, check_dtype=False, check_freq=False)
+        assert pd.Timestamp(pipeline.get_watermark(storage, table_name)) == until.floor(freq)
+
+def _sorted_analysis(df):
+    return df.sort_values(['metric_name', 'timestamp'], ignore_index=True)
+
+def test_incremental_run_matches_a_full_rebuild(storage, monkeypatch):
+    monkeypatch.setattr(pipeline, "get_storage", lambda *args: storage)
+    source = make_source("2023-01-01", 3 * 1440)
+    source['target_kiln_temperature'] = 100.0
+    first, new_day = source.iloc[:2 * 1440], source.iloc[2 * 1440:]
+
+    storage.write_table(first, pipeline.SOURCE_TABLE_ID, partition_field="timestamp")
+    pipeline.run_incremental_analysis_pipeline()  # No watermark yet: a full run
+    assert pd.Timestamp(pipeline.get_watermark(storage, pipeline.VARIANCE_ANALYSIS_TABLE_ID)) == first['timestamp'].max()
+
+    storage.write_table(new_day, pipeline.SOURCE_TABLE_ID, mode=pipeline.APPEND, partition_field="timestamp")
+    pipeline.run_incremental_analysis_pipeline()
+
+    analysis = storage.read_table(pipeline.VARIANCE_ANALYSIS_TABLE_ID)
+    pd.testing.assert_frame_equal(_sorted_analysis(analysis)[analysis.columns],
+                                  _sorted_analysis(pipeline.build_analysis_frame(source))[analysis.columns],
+                                  check_dtype=False)
+    predictions = storage.read_table(pipeline.MODEL_PREDICTIONS_TABLE_ID)
+    assert predictions['timestamp'].sort_values().tolist() == source['timestamp'].tolist()
+    for table_name in [pipeline.MODEL_PREDICTIONS_TABLE_ID, pipeline.VARIANCE_ANALYSIS_TABLE_ID]:
+        assert pd.Timestamp(pipeline.get_watermark(storage, table_name)) == source['timestamp'].max()
+
+    writes = []
+    write_table = storage.write_table
+    monkeypatch.setattr(storage, "write_table", lambda df, table_name, **kwargs: writes.append(table_name)
+                        or write_table(df, table_name, **kwargs))
+    pipeline.run_incremental_analysis_pipeline()
+
+    assert writes == []
+    assert len(storage.read_table(pipeline.VARIANCE_ANALYSIS_TABLE_ID)) == len(analysis)